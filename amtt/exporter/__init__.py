@@ -5,7 +5,32 @@ This module consists of all exporters available to the back-end.
 The currently available exporters are:
     - IsographExporter
         Exports the model to Isograph importable format.
+
+Exporters are registered in EXPORTERS and imported only when needed.
 """
+import importlib
+
+from amtt.errors import ExporterError
+
+# Target -> exporter class path.
+EXPORTERS = {
+    'isograph': 'amtt.exporter.isograph.IsographExporter',
+}
+
+
+def import_object(path):
+    """Import and return the object with the given dotted path."""
+    module_name, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module_name), name)
+
+
+def exporter_class(target):
+    """Return the exporter class of the given target."""
+    try:
+        path = EXPORTERS[target.lower()]
+    except KeyError:
+        raise ExporterError('Unknown target: {}'.format(target))
+    return import_object(path)
 
 
 class Exporter(object):
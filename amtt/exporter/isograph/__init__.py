@@ -1,24 +1,81 @@
 """Exporter module for Isograph Availability Workbench."""
 import logging
-import networkx as nx
-from itertools import count
+from collections import OrderedDict
 
-from amtt.translator.ir import component_basename
-from amtt.exporter import Exporter
-from amtt.exporter.isograph.emitter.xml import XmlEmitter
+from amtt.errors import ExporterError
+from amtt.exporter import Exporter, import_object
+from amtt.exporter.isograph.emitter import default_output_name
+from amtt.exporter.isograph.emitter.fanout import FanOutEmitter
+from amtt.exporter.isograph.layout import LAYOUT_ENGINES
+from amtt.exporter.isograph.layout_cache import (LayoutCache,
+                                                 DEFAULT_CACHE_SIZE)
 from amtt.exporter.isograph.rbd import Rbd
 from amtt.exporter.isograph.failure_models import fm_export
 
 _logger = logging.getLogger(__name__)
 
+# Output format -> emitter class path. The first one is the default.
+# Emitters are imported only when needed, as some of them depend on heavy
+# third-party packages (e.g. openpyxl).
+EMITTERS = OrderedDict([
+    ('xml', 'amtt.exporter.isograph.emitter.xml.XmlEmitter'),
+    ('xlsx', 'amtt.exporter.isograph.emitter.xlsx.XlsxEmitter'),
+    ('xls', 'amtt.exporter.isograph.emitter.excel.ExcelEmitter'),
+    ('csv', 'amtt.exporter.isograph.emitter.csv.CsvEmitter'),
+    ('sqlite', 'amtt.exporter.isograph.emitter.sqlite.SqliteEmitter'),
+])
+
 
 class IsographExporter(Exporter):
     """Exporter to export the model to Isograph."""
 
-    def __init__(self, translator):
-        """Initialize IsographExporter."""
+    def __init__(self, translator, output_format=None, emitters=None):
+        """Initialize IsographExporter.
+
+        Args:
+            translator (Translator): The translator.
+            output_format (str or list): The output format(s) (see EMITTERS).
+                If None, the output_format translator option is used
+                (default: xml).
+            emitters (list): The emitters to write the output to. If given,
+                output_format is ignored.
+
+        The model is serialized once; when there are several emitters, each
+        output row is broadcast to all of them.
+        """
         self._translator = translator
-        self._emitter = XmlEmitter(translator.output_basedir)
+        if emitters is None:
+            emitters = self.create_emitters(translator, output_format)
+        emitters = list(emitters)
+        if len(emitters) == 1:
+            self._emitter = emitters[0]
+        else:
+            self._emitter = FanOutEmitter(emitters)
+
+    @staticmethod
+    def create_emitters(translator, output_format=None):
+        """Create the emitters of the given output format(s).
+
+        All the emitters write to files with the same name (i.e. the output
+        files of a run differ only in their extension).
+        """
+        options = translator.options
+        if output_format is None:
+            output_format = options.get('output_format', next(iter(EMITTERS)))
+        if isinstance(output_format, str):
+            output_format = [output_format]
+        output_name = default_output_name()
+        emitters = []
+        for fmt in OrderedDict.fromkeys(output_format):  # Drop duplicates
+            try:
+                emitter_class = import_object(EMITTERS[fmt])
+            except KeyError:
+                raise ExporterError('Unknown output format: {}'.format(fmt))
+            emitters.append(emitter_class.from_options(
+                translator.output_basedir, options, output_name))
+        if not emitters:
+            raise ExporterError('No output format given')
+        return emitters
 
     @staticmethod
     def normalize_block_names(ir_container):
@@ -28,45 +85,59 @@ class IsographExporter(Exporter):
         In case the model uses template components, there is a big chance that
         the names will grow very big in length. Therefore, we store the
         base name in the description field and assign a unique integer (ID)
-        as the components name.
+        as the components name (see IRContainer.number_components).
         """
-        g = ir_container.component_graph
         if ir_container.uses_templates:
             _logger.info('Template usage detected:')
             _logger.info(' * Normalizing component names for Isograph')
-            # Create relabeling mapping.
-            # Each component name will be replaced with a number (ID).
-            relabel_mapping = {n: c for n, c in zip(g.nodes_iter(), count(1))}
-            del relabel_mapping['ROOT']  # We don't want to relabel ROOT
-            # Relabel and rename components graph
-            # -- copy=False means "relabel in-place"
-            nx.relabel_nodes(g, relabel_mapping, copy=False)
-            for u, v in nx.bfs_edges(g, 'ROOT'):
-                # -- get a hold of the associated object
-                vo = g.node[v]['obj']
-                # -- set base name as description
-                vo.description = component_basename(vo.name)
-                # -- set ID number as name
-                vo.name = v
+            ir_container.number_components()
             # Note: No need to relabel or rename failures graph
 
     def export(self):
-        """Export the model to Isograph importable format."""
+        """Export the model to Isograph importable format.
+
+        The output is opened only after the RBD has been built. If writing
+        the output fails, the emitter is aborted, so that no partially
+        written output is left behind.
+        """
         # Normalize block names, if necessary
         self.normalize_block_names(self._translator.ir_container)
-        # Export RBD (blocks, nodes, connections)
-        self._export_rbd()
-        # Export failure model definitions
-        self._export_failure_models()
-        # Write output file
-        self._emitter.commit()
-
-    def _export_rbd(self):
         # Create block diagram from input
-        rbd = Rbd()
+        rbd = self._create_rbd()
+        # Prepare output file (when streaming)
+        self._emitter.open()
+        try:
+            # Dump reliability block diagram (blocks, nodes, connections)
+            rbd.serialize(self._emitter)
+            # Export failure model definitions
+            self._export_failure_models()
+            # Write output file
+            self._emitter.commit()
+        except Exception:
+            self._emitter.abort()
+            raise
+
+    def _create_rbd(self):
+        options = self._translator.options
+        rbd = Rbd(layout_engine=options.get('layout_engine',
+                                            LAYOUT_ENGINES[0]),
+                  layout_cache=self._layout_cache())
         rbd.from_ir_container(self._translator.ir_container)
-        # Dump reliability block diagram to output
-        rbd.serialize(self._emitter)
+        return rbd
+
+    def _layout_cache(self):
+        """Return the layout cache to use or None, if caching is disabled."""
+        options = self._translator.options
+        enabled = options.get('layout_cache', False)
+        clear = options.get('clear_layout_cache', False)
+        if not enabled and not clear:
+            return None
+        size = options.get('layout_cache_size')
+        cache = LayoutCache(options.get('layout_cache_dir'),
+                            size if size is not None else DEFAULT_CACHE_SIZE)
+        if clear:
+            cache.clear()
+        return cache if enabled else None
 
     def _export_failure_models(self):
         fm_export(self._translator.ir_container, self._emitter)
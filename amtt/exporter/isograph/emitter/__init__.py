@@ -5,50 +5,138 @@ import abc
 import logging
 from datetime import datetime as dt
 
-from amtt.exporter.isograph.rows import *
+from collections import OrderedDict
+
+from amtt.exporter.isograph.rows import SCHEMA
+from amtt.exporter.isograph.emitter.columns import ColumnTable
 
 _logger = logging.getLogger(__name__)
 
 
+def default_output_name():
+    """Return a unique (timestamped) output file name, without extension."""
+    return 'model_{}'.format(dt.now().strftime('%Y%m%d_%H%M%S_%f'))
+
+
 class IsographEmitter(object):
-    """Base emitter class for Isograph."""
+    """Base emitter class for Isograph.
+
+    By default, rows are kept in memory until commit is called, which writes
+    them all to the output file. Rows are kept in column-oriented buffers,
+    one per output sheet (see the columns module).
 
-    def __init__(self, output_dir):
-        """Initialize IsographEmitter."""
+    Emitters that support streaming (supports_streaming = True) can instead
+    write each row to the output as soon as it is added, keeping memory
+    usage bounded. In streaming mode:
+        - open must be called before adding any rows.
+        - Connections are resolved against the blocks and nodes of their own
+          page only. Thus, all blocks and nodes of a page must be added
+          before its connections and before the rows of the next page.
+    Sub-classes implement streaming via _open_stream, _write_row and
+    _close_stream, and discard a partially written output via _abort_stream.
+    """
+
+    supports_streaming = False
+
+    def __init__(self, output_dir, streaming=False, output_name=None):
+        """Initialize IsographEmitter.
+
+        Args:
+            output_dir (str): The output directory.
+            streaming (bool): Whether to write the rows as they are added.
+            output_name (str): The output file name, without extension. If
+                None, a timestamped one is used (see default_output_name).
+        """
+        if streaming and not self.supports_streaming:
+            _logger.warning('%s does not support streaming, rows will be '
+                            'kept in memory', type(self).__name__)
+            streaming = False
+        self._streaming = streaming
         # Setup output path
         nobasedir = output_dir is None
         basedir = output_dir if not nobasedir else ''
-        output_path = 'model_{}'.format(dt.now().strftime('%Y%m%d_%H%M%S_%f'))
-        self._output_path = os.path.join(basedir, output_path)
+        if output_name is None:
+            output_name = default_output_name()
+        self._output_path = os.path.join(basedir, output_name)
         _logger.info('Output path is: ' + os.path.abspath(self.output_path))
-        # Initialize output row containers.
-        self._blocks = []
-        self._repeat_blocks = []
-        self._nodes = []
-        self._connections = []
-        self._failure_models = []
+        # Initialize output row buffers (output sheet -> ColumnTable)
+        self._tables = OrderedDict(
+            (sheet, ColumnTable(columns)) for sheet, columns in SCHEMA.items())
         # Initialize output identifier containers.
         self._ids = {}
+        self._ids_page = None  # The page of the identifiers (streaming only)
         # Initialize output identifier counters.
         self._next_block_id = 0
         self._next_repeat_block_id = 0
         self._next_node_id = 0
 
+    @classmethod
+    def from_options(cls, output_dir, options, output_name=None):
+        """Create an emitter, configured by the given exporter options."""
+        return cls(output_dir, streaming=options.get('streaming', False),
+                   output_name=output_name)
+
+    def open(self):
+        """Prepare the output for the incoming rows (streaming mode only)."""
+        if self._streaming:
+            self._open_stream()
+
+    def add_row(self, sheet, **kwargs):
+        """Add a new row to the given output sheet.
+
+        Delegate insertion to one of the methods below.
+        """
+        {   # Python-like switch :)
+            'RbdBlocks': self.add_block,
+            'RbdRepeatBlocks': self.add_repeat_block,
+            'RbdNodes': self.add_node,
+            'RbdConnections': self.add_connection,
+            'FailureModels': self.add_failure_model,
+        }[sheet](**kwargs)
+
+    def _emit(self, sheet, **kwargs):
+        """Store or (in streaming mode) write a row of the given sheet."""
+        values = tuple(kwargs.get(k) for k in SCHEMA[sheet])
+        if self._streaming:
+            self._write_row(sheet, values)
+        else:
+            self._tables[sheet].append(values)
+
+    def _write_tables(self):
+        """Write the rows kept in memory, one output sheet at a time."""
+        for sheet, table in self._tables.items():
+            for values in table.rows():
+                self._write_row(sheet, values)
+
+    def _register_id(self, identifier, page, index):
+        """Register the output index of the block/node identifier.
+
+        In streaming mode, only the identifiers of the current page are kept.
+        """
+        if self._streaming and page != self._ids_page:
+            self._ids.clear()
+            self._ids_page = page
+        self._ids[identifier] = index
+
     def add_block(self, **kwargs):
         """Add an RBD block to the output."""
-        self._blocks.append(RbdBlockRow(**kwargs))
-        self._ids[kwargs['Id']] = self._next_block_id
+        self._emit('RbdBlocks', **kwargs)
+        self._register_id(kwargs['Id'], kwargs.get('Page'),
+                          self._next_block_id)
         self._next_block_id += 1
 
     def add_repeat_block(self, **kwargs):
         """Add an RBD repeat block to the output."""
-        # TODO
-        pass
+        self._emit('RbdRepeatBlocks', **kwargs)
+        self._register_id(kwargs['Id'], kwargs.get('Page'),
+                          self._next_repeat_block_id)
+        self._next_repeat_block_id += 1
 
     def add_node(self, **kwargs):
         """Add an RBD node to the output."""
-        self._nodes.append(RbdNodeRow(**kwargs))
-        self._ids[kwargs['Id']] = self._next_node_id
+        self._emit('RbdNodes', **kwargs)
+        self._register_id(kwargs['Id'], kwargs.get('Page'),
+                          self._next_node_id)
         self._next_node_id += 1
 
     def add_connection(self, identifier, page, src_id, src_type, dst_id,
@@ -56,7 +144,8 @@ class IsographEmitter(object):
         """Add an RBD connection to the output."""
         src_index = self._ids[src_id]
         dst_index = self._ids[dst_id]
-        connection = RbdConnectionRow(
+        self._emit(
+            'RbdConnections',
             Id=identifier,
             Page=page,
             Type='Horizontal/vertical',
@@ -64,26 +153,64 @@ class IsographEmitter(object):
             InputObjectType=src_type,
             OutputObjectIndex=dst_index,
             OutputObjectType=dst_type)
-        self._connections.append(connection)
 
     def add_failure_model(self, name, distribution, mttf=None,
                           beta1=None, beta2=None, beta3=None,
                           eta1=None, eta2=None, eta3=None,
                           gamma1=None, gamma2=None, gamma3=None):
         """Add a Failure Model to the output."""
-        fm = FailureModelRow(
+        self._emit(
+            'FailureModels',
             Id=name, FmDistribution=distribution, FmMttf=mttf,
             FmBeta1=beta1, FmBeta2=beta2, FmBeta3=beta3,
             FmEta1=eta1, FmEta2=eta2, FmEta3=eta3,
             FmGamma1=gamma1, FmGamma2=gamma2, FmGamma3=gamma3)
-        self._failure_models.append(fm)
 
     @property
     def output_path(self):
         """str: the output file path."""
         return self._output_path
 
-    @abc.abstractmethod
+    @property
+    def streaming(self):
+        """bool: whether the emitter writes the rows as they are added."""
+        return self._streaming
+
     def commit(self):
-        """Commit (serialize) the model to the output file."""
+        """Commit (serialize) the model to the output file.
+
+        In streaming mode, finish writing the output file.
+        """
+        if self._streaming:
+            self._close_stream()
+        else:
+            self._commit()
+
+    def abort(self):
+        """Discard the output, e.g. when serialization has failed.
+
+        Close the output file, if open, and delete whatever has been written
+        to it, so that no partial output is left behind.
+        """
+        self._abort_stream()
+
+    @abc.abstractmethod
+    def _commit(self):
+        """Serialize the rows kept in memory to the output file."""
         raise NotImplementedError('IsographEmitter should be sub-classed')
+
+    def _open_stream(self):
+        """Open the output file for streaming."""
+        raise NotImplementedError('Streaming is not supported')
+
+    def _write_row(self, sheet, values):
+        """Write a row (values in SCHEMA[sheet] order) to the output file."""
+        raise NotImplementedError('Streaming is not supported')
+
+    def _close_stream(self):
+        """Finish writing and close the output file."""
+        raise NotImplementedError('Streaming is not supported')
+
+    def _abort_stream(self):
+        """Close the output file, if open, and delete it."""
+        pass
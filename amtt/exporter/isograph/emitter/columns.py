@@ -0,0 +1,75 @@
+"""Column-oriented output row buffers for the Isograph emitters.
+
+Each output sheet (see rows.SCHEMA) is buffered as a set of columns instead
+of a list of row objects:
+    - numeric columns (positions, indexes, votes) are typed arrays
+    - all other columns are lists, with their string values interned, since
+      the same pages, types, etc. are repeated in many rows.
+"""
+from array import array
+from sys import intern
+
+# Column -> array type code, for the numeric columns.
+NUMERIC_COLUMNS = {
+    'XPosition': 'd',
+    'YPosition': 'd',
+    'Vote': 'q',
+    'InputObjectIndex': 'q',
+    'OutputObjectIndex': 'q',
+}
+
+# Marks the missing (None) values of the integer columns.
+# Missing values of the floating point columns are stored as NaN.
+NULL_INTEGER = -2 ** 63
+NULL_FLOAT = float('nan')
+
+
+class ColumnTable(object):
+    """Column-oriented buffer of the rows of an output sheet."""
+
+    def __init__(self, columns):
+        """Initialize ColumnTable.
+
+        Args:
+            columns (list): The column names, in output order.
+        """
+        self._names = list(columns)
+        self._columns = [
+            array(NUMERIC_COLUMNS[c]) if c in NUMERIC_COLUMNS else []
+            for c in self._names
+        ]
+        self._length = 0
+
+    def append(self, values):
+        """Append a row (values in column order) to the table."""
+        for column, value in zip(self._columns, values):
+            if value is None:
+                if type(column) is array:
+                    value = NULL_FLOAT if column.typecode == 'd' \
+                        else NULL_INTEGER
+            elif type(value) is str:
+                value = intern(value)
+            column.append(value)
+        self._length += 1
+
+    def column(self, name):
+        """Return an iterator over the values of the named column."""
+        column = self._columns[self._names.index(name)]
+        if type(column) is not array:
+            return iter(column)
+        elif column.typecode == 'd':
+            return (None if v != v else v for v in column)  # NaN -> None
+        else:
+            return (None if v == NULL_INTEGER else v for v in column)
+
+    def rows(self):
+        """Return an iterator over the rows (value tuples) of the table."""
+        return zip(*(self.column(name) for name in self._names))
+
+    @property
+    def columns(self):
+        """list: the column names."""
+        return list(self._names)
+
+    def __len__(self):
+        return self._length
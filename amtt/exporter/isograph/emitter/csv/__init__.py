@@ -0,0 +1,100 @@
+"""CSV files emitter for Isograph."""
+
+import csv
+import gzip
+import logging
+import os
+
+from amtt.exporter.isograph.rows import SCHEMA
+from amtt.exporter.isograph.emitter import IsographEmitter
+
+_logger = logging.getLogger(__name__)
+
+# The output files buffer size, in bytes.
+BUFFER_SIZE = 1024 * 1024
+
+
+class CsvEmitter(IsographEmitter):
+    """CSV emitter for Isograph.
+
+    Writes one CSV file per output sheet (see rows.SCHEMA), named after the
+    sheet (e.g. RbdBlocks.csv), in the output directory. Each file starts
+    with a header row, which is needed to automate the column mappings when
+    importing to Isograph.
+
+    Rows are always written as soon as they are added (streaming), since
+    there is nothing to gain by keeping them in memory.
+    """
+
+    supports_streaming = True
+
+    def __init__(self, output_dir, streaming=True, delimiter=',',
+                 compress=False, output_name=None):
+        """Initialize CsvEmitter.
+
+        Args:
+            output_dir (str): The output directory.
+            streaming (bool): Ignored, the rows are always streamed.
+            delimiter (str): The one-character field delimiter.
+            compress (bool): Whether to gzip-compress each output file.
+            output_name (str): The output file name, without extension. If
+                None, a timestamped one is used (see default_output_name).
+        """
+        # Call to super-class initializer
+        super().__init__(output_dir, streaming=True, output_name=output_name)
+        if len(delimiter) != 1:
+            raise ValueError('The CSV delimiter must be one character')
+        self._delimiter = delimiter
+        self._compress = compress
+        self._files = []
+        self._writers = {}  # Output sheet -> csv.writer
+
+    @classmethod
+    def from_options(cls, output_dir, options, output_name=None):
+        """Create a CsvEmitter, configured by the given exporter options."""
+        return cls(output_dir,
+                   delimiter=options.get('csv_delimiter', ','),
+                   compress=options.get('compress', False),
+                   output_name=output_name)
+
+    def output_file_path(self, sheet):
+        """Return the output CSV file path of the given sheet."""
+        extension = 'csv.gz' if self._compress else 'csv'
+        return os.path.join(self.output_path, '.'.join((sheet, extension)))
+
+    def _open_stream(self):
+        """Create the output directory and open one CSV file per sheet."""
+        os.makedirs(self.output_path, exist_ok=True)
+        for sheet, columns in SCHEMA.items():
+            path = self.output_file_path(sheet)
+            if self._compress:
+                f = gzip.open(path, 'wt', newline='', encoding='utf-8')
+            else:
+                f = open(path, 'w', newline='', encoding='utf-8',
+                         buffering=BUFFER_SIZE)
+            self._files.append(f)
+            writer = csv.writer(f, delimiter=self._delimiter)
+            writer.writerow(columns)
+            self._writers[sheet] = writer
+
+    def _write_row(self, sheet, values):
+        """Write a row to the CSV file of the given sheet."""
+        self._writers[sheet].writerow(values)
+
+    def _close_stream(self):
+        """Close the output CSV files."""
+        for f in self._files:
+            f.close()
+        self._files.clear()
+        self._writers.clear()
+
+    def _abort_stream(self):
+        """Close and delete the output CSV files (and their directory)."""
+        self._close_stream()
+        for sheet in SCHEMA:
+            path = self.output_file_path(sheet)
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.isdir(self.output_path) and \
+                not os.listdir(self.output_path):
+            os.rmdir(self.output_path)
@@ -5,35 +5,29 @@ from collections import OrderedDict
 
 import pyexcel_xls as xls
 
-from amtt.exporter.isograph.rows import *
 from amtt.exporter.isograph.rows import SCHEMA
 from amtt.exporter.isograph.emitter import IsographEmitter
 
 _logger = logging.getLogger(__name__)
 
+# The output sheets written to the Excel file.
+SHEETS = ['RbdBlocks', 'RbdRepeatBlocks', 'RbdNodes', 'RbdConnections']
+
 
 class ExcelEmitter(IsographEmitter):
     """Microsoft Office Excel emitter for Isograph."""
 
-    def __init__(self, output_dir):
+    def __init__(self, output_dir, streaming=False, output_name=None):
         """Initialize ExcelEmitter."""
         # Call to super-class initializer
-        super().__init__(output_dir)
-        # First row is the header, which is needed to automate
-        # the column mappings when importing to Isograph.
-        self._blocks.append(RbdBlockRow.header())
-        self._repeat_blocks.append(RbdRepeatBlockRow.header())
-        self._nodes.append(RbdNodeRow.header())
-        self._connections.append(RbdConnectionRow.header())
+        super().__init__(output_dir, streaming, output_name)
 
-    def commit(self):
+    def _commit(self):
         """Commit (serialize) the model to the output Excel file."""
-        # List ExcelEmitter attributes.
-        sheet_attributes = [
-            '_blocks', '_repeat_blocks', '_nodes', '_connections'
-        ]
+        # First row is the header, which is needed to automate
+        # the column mappings when importing to Isograph.
         data = OrderedDict(
-            [(sheet, [[getattr(row, k) for k in SCHEMA[sheet]]
-                      for row in getattr(self, attr)])
-             for sheet, attr in zip(SCHEMA.keys(), sheet_attributes)])
+            [(sheet, [SCHEMA[sheet]] + [list(values) for values
+                                        in self._tables[sheet].rows()])
+             for sheet in SHEETS])
         xls.save_data('.'.join((self.output_path, 'xls')), data=data)
@@ -0,0 +1,113 @@
+"""Fan-out emitter for Isograph.
+
+Broadcasts the output rows to several emitters, so that the model can be
+serialized once and written to several output formats.
+"""
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+
+def _call(function):
+    """Call function on the current thread and return a (done) Future."""
+    future = Future()
+    try:
+        future.set_result(function())
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+class FanOutEmitter(object):
+    """Emitter broadcasting each row to a list of emitters.
+
+    Has the same interface as IsographEmitter. The emitters are opened and
+    receive the rows in the given order, but the emitters that keep their
+    rows in memory commit concurrently, one thread per emitter. Streaming
+    emitters commit on the calling thread, where their output was opened
+    (e.g. an SQLite connection must only be used by the thread creating it).
+    """
+
+    def __init__(self, emitters):
+        """Initialize FanOutEmitter.
+
+        Args:
+            emitters (list): The IsographEmitter objects to broadcast to.
+        """
+        self._emitters = list(emitters)
+        if not self._emitters:
+            raise ValueError('At least one emitter is required')
+
+    def open(self):
+        """Prepare the outputs of the emitters for the incoming rows."""
+        for emitter in self._emitters:
+            emitter.open()
+
+    def add_row(self, sheet, **kwargs):
+        """Add a new row to the given output sheet of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_row(sheet, **kwargs)
+
+    def add_block(self, **kwargs):
+        """Add an RBD block to the output of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_block(**kwargs)
+
+    def add_repeat_block(self, **kwargs):
+        """Add an RBD repeat block to the output of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_repeat_block(**kwargs)
+
+    def add_node(self, **kwargs):
+        """Add an RBD node to the output of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_node(**kwargs)
+
+    def add_connection(self, *args, **kwargs):
+        """Add an RBD connection to the output of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_connection(*args, **kwargs)
+
+    def add_failure_model(self, *args, **kwargs):
+        """Add a Failure Model to the output of every emitter."""
+        for emitter in self._emitters:
+            emitter.add_failure_model(*args, **kwargs)
+
+    def commit(self):
+        """Commit all emitters, concurrently where possible.
+
+        Wait for all of them to finish, then re-raise the first error
+        raised by an emitter (in emitter order), if any.
+        """
+        if len(self._emitters) == 1:
+            self._emitters[0].commit()
+            return
+        _logger.info('Committing %d outputs', len(self._emitters))
+        buffered = [e for e in self._emitters if not e.streaming]
+        with ThreadPoolExecutor(max_workers=max(len(buffered), 1)) as executor:
+            futures = {emitter: executor.submit(emitter.commit)
+                       for emitter in buffered}
+            for emitter in self._emitters:
+                if emitter.streaming:
+                    futures[emitter] = _call(emitter.commit)
+        for emitter in self._emitters:
+            futures[emitter].result()
+
+    def abort(self):
+        """Discard the output of every emitter.
+
+        An error raised by an emitter is logged, so that the rest of the
+        emitters are still aborted.
+        """
+        for emitter in self._emitters:
+            try:
+                emitter.abort()
+            except Exception:
+                _logger.exception('Failed to abort %s',
+                                  type(emitter).__name__)
+
+    @property
+    def emitters(self):
+        """list: the emitters broadcast to."""
+        return list(self._emitters)
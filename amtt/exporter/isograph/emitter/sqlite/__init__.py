@@ -0,0 +1,171 @@
+"""SQLite database emitter for Isograph."""
+
+import logging
+import os
+import sqlite3
+
+from amtt.exporter.isograph.rows import SCHEMA
+from amtt.exporter.isograph.emitter import IsographEmitter
+
+_logger = logging.getLogger(__name__)
+
+# Column -> SQL type, for the non-text columns.
+COLUMN_TYPES = {
+    'XPosition': 'REAL',
+    'YPosition': 'REAL',
+    'Vote': 'INTEGER',
+    'InputObjectIndex': 'INTEGER',
+    'OutputObjectIndex': 'INTEGER',
+    'FmMttf': 'REAL',
+    'FmBeta1': 'REAL',
+    'FmBeta2': 'REAL',
+    'FmBeta3': 'REAL',
+    'FmEta1': 'REAL',
+    'FmEta2': 'REAL',
+    'FmEta3': 'REAL',
+    'FmGamma1': 'REAL',
+    'FmGamma2': 'REAL',
+    'FmGamma3': 'REAL',
+}
+
+# Columns to index, once all rows have been inserted.
+INDEXED_COLUMNS = ('Id', 'Page')
+
+# Pragmas in effect while loading the rows. The database is a new file,
+# which is useless if the load fails, so durability is not a concern.
+LOAD_PRAGMAS = (
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA locking_mode = EXCLUSIVE',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',  # 64 MB
+)
+
+# Pragmas restored after the load.
+FINAL_PRAGMAS = (
+    'PRAGMA journal_mode = DELETE',
+    'PRAGMA synchronous = FULL',
+    'PRAGMA locking_mode = NORMAL',
+)
+
+# Default number of rows inserted per transaction.
+DEFAULT_BATCH_SIZE = 10000
+
+
+def create_table_statement(sheet):
+    """Return the CREATE TABLE statement of the given output sheet."""
+    columns = ', '.join('"{}" {}'.format(col, COLUMN_TYPES.get(col, 'TEXT'))
+                        for col in SCHEMA[sheet])
+    return 'CREATE TABLE "{}" ({})'.format(sheet, columns)
+
+
+def insert_statement(sheet):
+    """Return the (parameterized) INSERT statement of the given sheet."""
+    return 'INSERT INTO "{}" VALUES ({})'.format(
+        sheet, ', '.join('?' * len(SCHEMA[sheet])))
+
+
+def create_index_statements(sheet):
+    """Return the CREATE INDEX statements of the given output sheet."""
+    return ['CREATE INDEX "{0}_{1}" ON "{0}" ("{1}")'.format(sheet, col)
+            for col in INDEXED_COLUMNS if col in SCHEMA[sheet]]
+
+
+class SqliteEmitter(IsographEmitter):
+    """SQLite database emitter for Isograph.
+
+    Creates one table per output sheet (see rows.SCHEMA) in a new SQLite
+    database file. Rows are inserted in batches, one transaction per batch.
+    The Id and Page columns are indexed after all rows have been inserted.
+    """
+
+    supports_streaming = True
+
+    def __init__(self, output_dir, streaming=False,
+                 batch_size=DEFAULT_BATCH_SIZE, output_name=None):
+        """Initialize SqliteEmitter.
+
+        Args:
+            output_dir (str): The output directory.
+            streaming (bool): Whether to insert the rows as they are added.
+            batch_size (int): The number of rows inserted per transaction.
+            output_name (str): The output file name, without extension. If
+                None, a timestamped one is used (see default_output_name).
+        """
+        # Call to super-class initializer
+        super().__init__(output_dir, streaming, output_name)
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+        self._batch_size = batch_size
+        self._connection = None
+        self._batches = {}  # Output sheet -> pending rows
+        self._pending = 0  # Total number of pending rows
+
+    @property
+    def output_file_path(self):
+        """str: the output SQLite database file path."""
+        return '.'.join((self.output_path, 'sqlite'))
+
+    def _open_stream(self):
+        """Create the database file and its tables."""
+        path = self.output_file_path
+        if os.path.exists(path):
+            os.remove(path)
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        for pragma in LOAD_PRAGMAS:
+            self._connection.execute(pragma)
+        self._connection.execute('BEGIN')
+        for sheet in SCHEMA:
+            self._connection.execute(create_table_statement(sheet))
+            self._batches[sheet] = []
+        self._connection.execute('COMMIT')
+
+    def _write_row(self, sheet, values):
+        """Queue a row for insertion, inserting the batch when full."""
+        self._batches[sheet].append(values)
+        self._pending += 1
+        if self._pending >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        """Insert all pending rows, in one transaction."""
+        if not self._pending:
+            return
+        self._connection.execute('BEGIN')
+        for sheet, rows in self._batches.items():
+            if rows:
+                self._connection.executemany(insert_statement(sheet), rows)
+                rows.clear()
+        self._connection.execute('COMMIT')
+        self._pending = 0
+
+    def _close_stream(self):
+        """Insert the pending rows, create the indexes and close."""
+        self._flush()
+        _logger.info('Creating database indexes')
+        self._connection.execute('BEGIN')
+        for sheet in SCHEMA:
+            for statement in create_index_statements(sheet):
+                self._connection.execute(statement)
+        self._connection.execute('COMMIT')
+        for pragma in FINAL_PRAGMAS:
+            self._connection.execute(pragma)
+        self._connection.close()
+        self._connection = None
+        self._batches.clear()
+
+    def _abort_stream(self):
+        """Close and delete the output database file."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self._batches.clear()
+        self._pending = 0
+        if os.path.exists(self.output_file_path):
+            os.remove(self.output_file_path)
+
+    def _commit(self):
+        """Commit (serialize) the model to the output database file."""
+        self._open_stream()
+        self._write_tables()
+        self._close_stream()
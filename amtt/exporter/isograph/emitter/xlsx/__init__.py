@@ -0,0 +1,101 @@
+"""Microsoft Office Excel (Open XML) files emitter for Isograph."""
+
+import logging
+import os
+
+from openpyxl import Workbook
+
+from amtt.exporter.isograph.rows import SCHEMA
+from amtt.exporter.isograph.emitter import IsographEmitter
+
+_logger = logging.getLogger(__name__)
+
+# Maximum number of rows per worksheet (including the header),
+# as imposed by the XLSX format.
+MAX_SHEET_ROWS = 1048576
+
+
+class XlsxEmitter(IsographEmitter):
+    """Microsoft Office Excel (.xlsx) emitter for Isograph.
+
+    Rows are appended to write-only worksheets, which openpyxl flushes to
+    temporary files, so that the workbook is never kept in memory as a whole.
+
+    Each output sheet (see rows.SCHEMA) starts with a header row, which is
+    needed to automate the column mappings when importing to Isograph.
+    Whenever a worksheet gets full, the rows that follow are written to a
+    new worksheet (e.g. RbdBlocks_2), which starts with the header row too.
+    """
+
+    supports_streaming = True
+
+    def __init__(self, output_dir, streaming=False,
+                 max_sheet_rows=MAX_SHEET_ROWS, output_name=None):
+        """Initialize XlsxEmitter.
+
+        Args:
+            output_dir (str): The output directory.
+            streaming (bool): Whether to write the rows as they are added.
+            max_sheet_rows (int): The maximum number of rows per worksheet,
+                including the header row.
+            output_name (str): The output file name, without extension. If
+                None, a timestamped one is used (see default_output_name).
+        """
+        # Call to super-class initializer
+        super().__init__(output_dir, streaming, output_name)
+        if max_sheet_rows < 2:
+            raise ValueError('max_sheet_rows must be at least 2')
+        self._max_sheet_rows = max_sheet_rows
+        self._workbook = None
+        # Output sheet -> [current worksheet, number of worksheets, rows]
+        self._worksheets = {}
+
+    @property
+    def output_file_path(self):
+        """str: the output XLSX file path."""
+        return '.'.join((self.output_path, 'xlsx'))
+
+    def _add_worksheet(self, sheet):
+        """Add a new worksheet (with a header row) for the output sheet."""
+        state = self._worksheets.get(sheet)
+        number = state[1] + 1 if state else 1
+        title = sheet if number == 1 else '{}_{}'.format(sheet, number)
+        if number > 1:
+            _logger.info('Sheet %s is full, continuing to %s', sheet, title)
+        worksheet = self._workbook.create_sheet(title)
+        worksheet.append(SCHEMA[sheet])
+        self._worksheets[sheet] = [worksheet, number, 1]
+
+    def _open_stream(self):
+        """Create the (write-only) workbook and its worksheets."""
+        self._workbook = Workbook(write_only=True)
+        for sheet in SCHEMA:
+            self._add_worksheet(sheet)
+
+    def _write_row(self, sheet, values):
+        """Append a row to the worksheet of the output sheet."""
+        state = self._worksheets[sheet]
+        if state[2] == self._max_sheet_rows:
+            self._add_worksheet(sheet)
+            state = self._worksheets[sheet]
+        state[0].append(values)
+        state[2] += 1
+
+    def _close_stream(self):
+        """Save the workbook to the output XLSX file."""
+        self._workbook.save(self.output_file_path)
+        self._workbook = None
+        self._worksheets.clear()
+
+    def _abort_stream(self):
+        """Drop the workbook and delete the output XLSX file, if any."""
+        self._workbook = None
+        self._worksheets.clear()
+        if os.path.exists(self.output_file_path):
+            os.remove(self.output_file_path)
+
+    def _commit(self):
+        """Commit (serialize) the model to the output XLSX file."""
+        self._open_stream()
+        self._write_tables()
+        self._close_stream()
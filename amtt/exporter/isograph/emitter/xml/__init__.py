@@ -3,67 +3,98 @@ import os
 import sys
 import logging
 
-from lxml import etree
-from collections import OrderedDict
 
 from amtt.exporter.isograph.rows import SCHEMA
 from amtt.exporter.isograph.emitter import IsographEmitter
+from amtt.exporter.isograph.emitter.xml.writer import XmlWriter
 
 _logger = logging.getLogger(__name__)
 
 
+def template_path():
+    """Return the path of the template XML file."""
+    if getattr(sys, 'frozen', False):  # Running from a bundle
+        return os.path.join(
+            os.path.abspath(sys._MEIPASS),
+            *__name__.split('.'),
+            'template-2.1.xml', )
+    else:  # Running from outside a bundle (e.g. pip installation)
+        return os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'template-2.1.xml')
+
+
 class XmlEmitter(IsographEmitter):
-    """XML emitter for Isograph."""
+    """XML emitter for Isograph.
+
+    The output is written incrementally: the template header is copied to
+    the output file, followed by one record per row. In streaming mode, each
+    row is written as soon as it is added, otherwise all rows are written
+    on commit.
+    """
+
+    supports_streaming = True
 
-    def __init__(self, output_dir):
-        """Initialize XmlEmitter."""
+    def __init__(self, output_dir, streaming=False, compact=False,
+                 compress=False, output_name=None):
+        """Initialize XmlEmitter.
+
+        Args:
+            output_dir (str): The output directory.
+            streaming (bool): Whether to write the rows as they are added.
+            compact (bool): Whether to omit indentation and line breaks
+                between the rows (smaller output file).
+            compress (bool): Whether to gzip-compress the output file.
+            output_name (str): The output file name, without extension. If
+                None, a timestamped one is used (see default_output_name).
+        """
         # Call to super-class initializer
-        super().__init__(output_dir)
+        super().__init__(output_dir, streaming, output_name)
+        self._compact = compact
+        self._compress = compress
+        self._writer = None
 
-    def commit(self):
-        """Commit (serialize) the model to the output XML file."""
-        # Determine the template XML file path
-        if getattr(sys, 'frozen', False):  # Running from a bundle
-            template_path = os.path.join(
-                os.path.abspath(sys._MEIPASS),
-                *__name__.split('.'),
-                'template-2.1.xml', )
-        else:  # Running from outside a bundle (e.g. pip installation)
-            template_path = os.path.join(
-                os.path.dirname(os.path.abspath(__file__)), 'template-2.1.xml')
-        # Open the XML file and read the XML tree into memory
-        with open(template_path, 'rb') as f:
-            parser = etree.XMLParser(remove_blank_text=True)
-            tree = etree.parse(f, parser)
-        # Fill the XML tree with the model elements
-        root = tree.getroot()
-        # self attributes -> SCHEMA keys mappings
-        mappings = OrderedDict([
-            ('_blocks', 'RbdBlocks'),
-            ('_repeat_blocks', 'RbdRepeatBlocks'),
-            ('_nodes', 'RbdNodes'),
-            ('_connections', 'RbdConnections'),
-            ('_failure_models', 'FailureModels'),
-        ])
+    @classmethod
+    def from_options(cls, output_dir, options, output_name=None):
+        """Create an XmlEmitter, configured by the given exporter options."""
+        return cls(output_dir,
+                   streaming=options.get('streaming', False),
+                   compact=options.get('compact', False),
+                   compress=options.get('compress', False),
+                   output_name=output_name)
+
+    @property
+    def output_file_path(self):
+        """str: the output XML file path."""
+        extension = 'xml.gz' if self._compress else 'xml'
+        return '.'.join((self.output_path, extension))
+
+    def _open_stream(self):
+        """Open the output XML file and write the template header."""
+        self._writer = XmlWriter(self.output_file_path, template_path(),
+                                 pretty_print=not self._compact,
+                                 compress=self._compress)
         # Add dummy project ID (for the time being)
-        xproject = etree.SubElement(root, 'Project')
-        xproject_id = etree.SubElement(xproject, 'Id')
-        xproject_id.text = 'AMTT_ExportedProject'
-        # Iterate over mappings
-        for attr, key in mappings.items():
-            for row in getattr(self, attr):
-                # -- create an XML sub-element for the current row
-                xml_element = etree.SubElement(root, key)
-                # -- add row values (columns) to XML element
-                for col in SCHEMA[key]:
-                    val = getattr(row, col)  # Get column from row
-                    if val is None:
-                        continue
-                    xcol = etree.SubElement(xml_element, col)
-                    xcol.text = str(val)
-        # Write resulting XML to output path
-        with open('.'.join((self.output_path, 'xml')), 'wb') as f:
-            f.write(b'<?xml version="1.0" standalone="yes"?>')
-            f.write(os.linesep.encode())
-            et = etree.ElementTree(root)  # Convert root to ElementTree object
-            et.write(f, pretty_print=True)  # Write to file
+        self._writer.write_record('Project', [('Id', 'AMTT_ExportedProject')])
+
+    def _write_row(self, sheet, values):
+        """Write a row to the output XML file."""
+        self._writer.write_record(sheet, zip(SCHEMA[sheet], values))
+
+    def _close_stream(self):
+        """Write the template footer and close the output XML file."""
+        self._writer.close()
+        self._writer = None
+
+    def _abort_stream(self):
+        """Close and delete the output XML file."""
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        if os.path.exists(self.output_file_path):
+            os.remove(self.output_file_path)
+
+    def _commit(self):
+        """Commit (serialize) the model to the output XML file."""
+        self._open_stream()
+        self._write_tables()
+        self._close_stream()
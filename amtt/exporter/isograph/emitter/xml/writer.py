@@ -0,0 +1,93 @@
+"""Incremental XML writer for the Isograph XML emitter.
+
+Writes the XML output one record (e.g. RBD block) at a time, without keeping
+an XML tree in memory. In the pretty printing mode, the records are the same
+as the ones of lxml's pretty printer. The template header and footer are
+copied verbatim, thus they are not normalized as lxml would do.
+"""
+import gzip
+import io
+
+from xml.sax.saxutils import escape
+
+# The closing tag of the template (and the output) root element.
+ROOT_CLOSING_TAG = b'</XMLExport>'
+
+# The output file buffer size, in bytes.
+BUFFER_SIZE = 1024 * 1024
+
+
+def split_template(path):
+    """Split the template XML file at the closing tag of its root element.
+
+    Return the (header, footer) tuple: the records shall be written between
+    the two, as children of the root element.
+    """
+    with open(path, 'rb') as f:
+        template = f.read()
+    header, sep, footer = template.rpartition(ROOT_CLOSING_TAG)
+    if not sep:
+        raise ValueError('Invalid template XML file: {}'.format(path))
+    return header, sep + footer
+
+
+class XmlWriter(object):
+    """Incremental XML writer.
+
+    Copies the template header verbatim to the output file, then writes
+    each record as soon as write_record is called. close writes the template
+    footer and closes the output file.
+    """
+
+    def __init__(self, path, template_path, pretty_print=True,
+                 compress=False):
+        """Initialize XmlWriter.
+
+        Args:
+            path (str): The output file path.
+            template_path (str): The template XML file path.
+            pretty_print (bool): Whether to indent the records.
+            compress (bool): Whether to gzip-compress the output file.
+        """
+        header, self._footer = split_template(template_path)
+        if compress:
+            self._file = io.BufferedWriter(gzip.open(path, 'wb'),
+                                           buffer_size=BUFFER_SIZE)
+        else:
+            self._file = open(path, 'wb', buffering=BUFFER_SIZE)
+        if pretty_print:
+            self._record_start = '  <{}>\n'
+            self._record_end = '  </{}>\n'
+            self._field = '    <{0}>{1}</{0}>\n'
+        else:
+            # Keep the template header as is, but strip the whitespace
+            # between the records.
+            header = header.rstrip()
+            self._record_start = '<{}>'
+            self._record_end = '</{}>'
+            self._field = '<{0}>{1}</{0}>'
+        self._file.write(header)
+
+    def write_record(self, tag, fields):
+        """Write a record to the output file.
+
+        Args:
+            tag (str): The record tag (e.g. 'RbdBlocks').
+            fields: Iterable of (tag, value) tuples. Fields with a None
+                value are skipped.
+        """
+        parts = [self._record_start.format(tag)]
+        parts.extend(self._field.format(name, escape(str(value)))
+                     for name, value in fields if value is not None)
+        parts.append(self._record_end.format(tag))
+        self._file.write(
+            ''.join(parts).encode('ascii', 'xmlcharrefreplace'))
+
+    def close(self):
+        """Write the template footer and close the output file."""
+        self._file.write(self._footer)
+        self._file.close()
+
+    def abort(self):
+        """Close the output file, without writing the template footer."""
+        self._file.close()
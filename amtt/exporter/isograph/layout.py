@@ -0,0 +1,183 @@
+"""
+Isograph exporter RBD layout module.
+
+Computes the diagram coordinates of the elements (blocks and nodes) found in
+the internal graph of each compound RBD block.
+
+Two layout engines are available:
+    - builtin
+        A pure-Python layered (left to right) layout engine, suitable for the
+        series/parallel/k-out-of-n structures produced by the RBD builder.
+    - graphviz
+        Delegates the layout to the Graphviz dot program (requires Graphviz).
+        All graphs are laid out by a single dot invocation.
+"""
+
+import hashlib
+import logging
+import shlex
+import subprocess
+
+import networkx as nx
+
+from amtt.errors import ExporterError
+
+_logger = logging.getLogger(__name__)
+
+# The available layout engines. The first one is the default.
+LAYOUT_ENGINES = ('builtin', 'graphviz')
+
+# Element dimensions and spacing (in points), same as the Graphviz defaults.
+NODE_WIDTH = 54  # 0.75 inches
+NODE_HEIGHT = 36  # 0.5 inches
+RANK_SEPARATION = 36  # 0.5 inches
+NODE_SEPARATION = 18  # 0.25 inches
+
+# Graphviz plain output coordinates are in inches.
+POINTS_PER_INCH = 72
+
+
+def compute_layouts(graphs, engine=LAYOUT_ENGINES[0]):
+    """Compute the layout of each graph in graphs by using the given engine.
+
+    Return a list containing, for each graph, a dict mapping each node of the
+    graph to its (x, y) coordinates.
+    """
+    if engine == 'builtin':
+        return [layered_layout(g) for g in graphs]
+    elif engine == 'graphviz':
+        return graphviz_layouts(graphs)
+    else:
+        raise ExporterError('Unknown layout engine: {}'.format(engine))
+
+
+def structural_fingerprint(graph):
+    """Return the structural fingerprint of an RBD internal graph.
+
+    The fingerprint takes into account the kind (block or node), the vote
+    value and the instance number of each element, as well as the edges
+    between the elements, but not the element names.
+
+    Graphs with the same fingerprint have the same structure and their nodes
+    correspond to each other one to one, in insertion order. Therefore, they
+    can share one layout.
+    """
+    def describe(obj):
+        return (obj.type, getattr(obj, 'vote_value', None),
+                getattr(obj, 'instance', None))
+
+    index = {n: i for i, n in enumerate(graph.nodes_iter())}
+    nodes = tuple(describe(graph.node[n]['obj']) for n in graph.nodes_iter())
+    edges = tuple(sorted((index[u], index[v]) for u, v in graph.edges_iter()))
+    return hashlib.sha1(repr((nodes, edges)).encode('utf-8')).hexdigest()
+
+
+def layered_layout(graph):
+    """Compute a left to right layered layout for graph.
+
+    graph shall be a directed acyclic graph (nx.DiGraph).
+
+    Each node is assigned to a rank (column), equal to the length of the
+    longest path that reaches it from a node with in degree = 0. Within each
+    rank, nodes are ordered by the average position of their predecessors,
+    so that parallel branches do not cross each other. Ranks are vertically
+    centered with respect to the tallest rank.
+
+    Coordinates follow the Graphviz conventions (points, origin at the
+    bottom left corner), so that both engines produce similar diagrams.
+    """
+    # Assign ranks, following a topological order of the nodes
+    rank = {}
+    ranks = []
+    for n in nx.topological_sort(graph):
+        rank[n] = max((rank[p] + 1 for p in graph.predecessors_iter(n)),
+                      default=0)
+        if rank[n] == len(ranks):
+            ranks.append([])
+        ranks[rank[n]].append(n)
+    # Order the nodes within each rank, one rank at a time, so that the
+    # positions of the predecessors are final when a rank gets ordered.
+    position = {}
+    for nodes in ranks:
+        def barycenter(n):
+            preds = [position[p] for p in graph.predecessors_iter(n)]
+            return sum(preds) / len(preds) if preds else 0
+        nodes.sort(key=barycenter)  # Stable, keeps topological order on ties
+        position.update((n, i) for i, n in enumerate(nodes))
+    # Determine the coordinates of each node
+    step_x = NODE_WIDTH + RANK_SEPARATION
+    step_y = NODE_HEIGHT + NODE_SEPARATION
+    height = max((len(nodes) for nodes in ranks), default=0)
+    coordinates = {}
+    for r, nodes in enumerate(ranks):
+        offset = (height - len(nodes)) / 2
+        for i, n in enumerate(nodes):
+            x = NODE_WIDTH / 2 + r * step_x
+            y = NODE_HEIGHT / 2 + (offset + len(nodes) - 1 - i) * step_y
+            coordinates[n] = int(x), int(y)
+    return coordinates
+
+
+def graphviz_layouts(graphs):
+    """Compute the layout of graphs by invoking the Graphviz dot program.
+
+    All graphs are written into one multi-graph DOT document, which is laid
+    out by a single dot invocation. The positions are read back from the
+    plain output format of dot, which is much cheaper to parse than DOT.
+    """
+    graphs = list(graphs)
+    if not graphs:
+        return []
+    document = '\n'.join(to_dot(g, i) for i, g in enumerate(graphs))
+    _logger.debug('Invoking dot to lay out %d graphs', len(graphs))
+    try:
+        result = subprocess.run(['dot', '-Tplain'],
+                                input=document.encode('utf-8'),
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE,
+                                check=True)
+    except FileNotFoundError:
+        _logger.error('The Graphviz dot program was not found')
+        raise ExporterError('Graphviz is required for the graphviz layout')
+    except subprocess.CalledProcessError as e:
+        _logger.error('dot exited with: %s', e.stderr.decode(errors='ignore'))
+        raise ExporterError('Graphviz failed to lay out the RBD diagrams')
+    layouts = parse_plain(result.stdout.decode('utf-8'))
+    if len(layouts) != len(graphs):
+        raise ExporterError('Graphviz returned {} layouts for {} graphs'
+                            .format(len(layouts), len(graphs)))
+    # The DOT nodes are named after their position (see to_dot)
+    return [{n: layout[str(i)] for i, n in enumerate(g.nodes_iter())}
+            for g, layout in zip(graphs, layouts)]
+
+
+def to_dot(graph, index):
+    """Return the DOT representation of graph, named after index.
+
+    The nodes are named after their position in graph, as the graph nodes
+    (element ids) are not necessarily strings.
+    """
+    ids = {n: i for i, n in enumerate(graph.nodes_iter())}
+    lines = ['digraph G{} {{'.format(index), 'rankdir=LR;']
+    lines.extend('{};'.format(i) for i in range(len(ids)))
+    lines.extend('{} -> {};'.format(ids[u], ids[v])
+                 for u, v in graph.edges_iter())
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def parse_plain(output):
+    """Parse the (multi-graph) plain output of dot.
+
+    Return a list of dicts, one per graph, mapping each node to its (x, y)
+    coordinates, in points.
+    """
+    layouts = []
+    for line in output.splitlines():
+        if line.startswith('graph '):
+            layouts.append({})
+        elif line.startswith('node '):
+            _, name, x, y = shlex.split(line)[:4]
+            layouts[-1][name] = int(float(x) * POINTS_PER_INCH), \
+                int(float(y) * POINTS_PER_INCH)
+    return layouts
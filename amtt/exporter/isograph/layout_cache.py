@@ -0,0 +1,145 @@
+"""
+Isograph exporter persistent layout cache module.
+
+Stores the coordinate tables computed by the layout engines on disk, so that
+the layouts of the compound blocks can be reused across runs.
+
+Each coordinate table is stored in its own file, named after a content hash
+of the laid out internal graph (see layout.structural_fingerprint) and the
+layout engine used. The cache directory has a size cap; whenever it is
+exceeded, the least recently used tables are evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+# Bump whenever the layout engines or the stored format change,
+# in order to invalidate the existing cache entries.
+CACHE_FORMAT_VERSION = 1
+
+# Default cache size cap, in megabytes.
+DEFAULT_CACHE_SIZE = 64
+
+CACHE_ENTRY_SUFFIX = '.json'
+
+
+def default_cache_dir():
+    """Return the default (platform specific) layout cache directory."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+        return os.path.join(base, 'amtt', 'cache', 'layouts')
+    base = os.environ.get('XDG_CACHE_HOME',
+                          os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'amtt', 'layouts')
+
+
+class LayoutCache(object):
+    """Persistent, size capped, LRU cache of diagram coordinate tables."""
+
+    def __init__(self, directory=None, max_size=DEFAULT_CACHE_SIZE):
+        """Initialize LayoutCache.
+
+        Args:
+            directory (str): The cache directory (created if needed).
+                If None, the default cache directory is used.
+            max_size (int): The cache size cap, in megabytes.
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be positive')
+        self._directory = directory or default_cache_dir()
+        self._max_size = max_size * 1024 * 1024
+        self._hits = 0
+        self._misses = 0
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory, mode=0o755)
+        _logger.info('Layout cache directory is: %s', self._directory)
+
+    def _path(self, engine, fingerprint):
+        """Return the file path of the entry for (engine, fingerprint)."""
+        key = '{}:{}:{}'.format(CACHE_FORMAT_VERSION, engine, fingerprint)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self._directory, name + CACHE_ENTRY_SUFFIX)
+
+    def get(self, engine, fingerprint):
+        """Return the cached coordinates list or None if not cached."""
+        path = self._path(engine, fingerprint)
+        try:
+            with open(path, 'r') as f:
+                coordinates = [tuple(c) for c in json.load(f)]
+        except (OSError, ValueError):  # Not cached or unreadable
+            self._misses += 1
+            return None
+        try:
+            os.utime(path)  # Mark entry as recently used
+        except OSError:  # Evicted meanwhile (e.g. by a concurrent run)
+            pass
+        self._hits += 1
+        return coordinates
+
+    def put(self, engine, fingerprint, coordinates):
+        """Store the coordinates list for (engine, fingerprint)."""
+        path = self._path(engine, fingerprint)
+        # Write to a temporary file first, so that concurrent runs
+        # never read partially written entries.
+        fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(coordinates, f, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except OSError:
+            _logger.warning('Could not write layout cache entry: %s', path)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _entries(self):
+        """Return (mtime, size, path) for each entry, oldest first."""
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self):
+        """Evict the least recently used entries, until below the size cap."""
+        entries = self._entries()
+        size = sum(s for _, s, _ in entries)
+        evicted = 0
+        for _, entry_size, path in entries:
+            if size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:  # Already removed (e.g. by a concurrent run)
+                pass
+            size -= entry_size
+            evicted += 1
+        if evicted:
+            _logger.info('Evicted %d layout cache entries', evicted)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        _logger.info('Clearing layout cache')
+        for _, _, path in self._entries():
+            os.remove(path)
+
+    @property
+    def directory(self):
+        """str: the cache directory."""
+        return self._directory
+
+    @property
+    def hits(self):
+        """int: the number of cache hits so far."""
+        return self._hits
+
+    @property
+    def misses(self):
+        """int: the number of cache misses so far."""
+        return self._misses
@@ -16,18 +16,20 @@ time trying to fix or implement something on this module, then for your own
 well-being (and possibly also humanity's) please consider re-writing it.
 """
 
-import itertools
 import logging
 import re
 from collections import OrderedDict, deque
+from copy import copy
 from enum import Enum
 from itertools import groupby, chain
 
 import networkx as nx
-import pydotplus
 from sliding_window import window
 
 from amtt.errors import ExporterError
+from amtt.exporter.isograph.layout import (LAYOUT_ENGINES, compute_layouts,
+                                           structural_fingerprint)
+from amtt.translator.ir import dotted
 
 _logger = logging.getLogger(__name__)
 
@@ -84,6 +86,71 @@ def parse_code(c):
         return c
 
 
+def compound_subgraphs(components):
+    """Extract the sub-graphs that determine the structure of the compounds.
+
+    Given the components, as (node, object, children) tuples in BFS order
+    (see IRContainer.iter_components), yield a (node, sub-graph) tuple per
+    compound node, in the same order. The sub-graph contains the compound
+    node and its descendants, down to (and including) the first compound
+    descendants of each branch, whose internal structure is determined by
+    their own sub-graphs.
+
+    Each sub-graph is yielded as soon as all of its nodes have been consumed
+    (and the sub-graphs of the preceding compounds have been yielded), thus
+    the components are never needed all at once.
+    """
+    subgraphs = {}  # compound node -> (sub-graph, nodes not consumed yet)
+    owners = {}  # node not consumed yet -> compound node of its sub-graph
+    queue = deque()  # compound nodes, in BFS order
+    for node, obj, children in components:
+        owner = owners.pop(node, None)
+        if owner is not None:
+            subgraph, waiting = subgraphs[owner]
+            subgraph.node[node]['obj'] = obj
+            waiting.discard(node)
+        if obj.is_type('compound'):
+            # The children of a compound belong to its own sub-graph
+            owner = node
+            subgraph, waiting = nx.DiGraph(), set()
+            subgraph.add_node(node, obj=obj)
+            subgraphs[node] = (subgraph, waiting)
+            queue.append(node)
+        if owner is not None:
+            for child in children:
+                subgraph.add_node(child)
+                subgraph.add_edge(node, child)
+                owners[child] = owner
+                waiting.add(child)
+        while queue and not subgraphs[queue[0]][1]:
+            node = queue.popleft()
+            yield node, subgraphs.pop(node)[0]
+
+
+def spec_fingerprint(spec_graph, failures_key):
+    """Return the fingerprint of the specification of a compound block.
+
+    The specification consists of the compound block sub-graph (spec_graph)
+    and the failures sub-graph identified by failures_key. Element names are
+    not taken into account, thus the specifications of the instances of the
+    same template component have the same fingerprint.
+    """
+    def describe(obj):
+        logic = obj.logic
+        if logic is not None:
+            logic = (logic.name.lower(), logic.voting, logic.total)
+        return (obj.type.lower(), logic, obj.instances, obj.code,
+                obj.description)
+
+    index = {n: i for i, n in enumerate(spec_graph.nodes_iter())}
+    return (
+        failures_key,
+        tuple(describe(get_node_object(spec_graph, n))
+              for n in spec_graph.nodes_iter()),
+        tuple((index[u], index[v]) for u, v in spec_graph.edges_iter()),
+    )
+
+
 def logic_to_standby_mode(logic):
     """Determine standby mode for given logic."""
     if logic == 'active':
@@ -101,7 +168,12 @@ class _CompoundBlock(object):
         self._name = name
         self._code = parse_code(code)
         self._block_graph = None
-        self._dot_graph = None
+        self._positions = None
+        self._fingerprint = None
+        # Serialization caches
+        self._elements = None
+        self._connections = None
+        self._local_ids = {}
 
     def generate_internal_graph(self, spec_graph, failures_graph):
         g = spec_graph
@@ -123,17 +195,35 @@ class _CompoundBlock(object):
                 else:
                     yield _RbdBlock(**kwargs)
 
-        def look_for_hint(n):
+        def index_failures():
+            """Index the failures sub-graph (f) with a single DFS.
+
+            Return a dict mapping each failure element name to the layout
+            hint implied by the logic of its parent, as well as the list of
+            (failure event object, parent object) pairs, in DFS order.
+            """
+            hints, events = {}, []
+            if f is None:  # No failures defined for the component
+                return hints, events
             r = next(filter(lambda x: f.in_degree(x) == 0, f.nodes_iter()))
             for u, v in nx.dfs_edges(f, r):
-                no = get_node_object(g, n)
-                to_compare = no.description if no.description else no.name
-                if to_compare == get_node_object(f, v).name:
-                    logic = get_node_object(f, u).logic
-                    if logic in ('or', 'active', 'standby'):
-                        g.node[n].update(hint=Layout.parallel)
-                    elif logic == 'and':
-                        g.node[n].update(hint=Layout.series)
+                # The root is a system component, without associated object
+                uo, vo = f.node[u].get('obj'), get_node_object(f, v)
+                logic = uo.logic if uo is not None else None
+                if logic in ('or', 'active', 'standby'):
+                    hints[vo.name] = Layout.parallel
+                elif logic == 'and':
+                    hints[vo.name] = Layout.series
+                if vo.is_type('FailureEvent'):
+                    events.append((vo, uo))
+            return hints, events
+
+        def look_for_hint(n):
+            no = get_node_object(g, n)
+            to_compare = no.description if no.description else no.name[-1]
+            hint = failure_hints.get(to_compare)
+            if hint is not None:
+                g.node[n].update(hint=hint)
 
         def create_basic_diagram(leaf):
             o = get_node_object(g, leaf)
@@ -145,43 +235,46 @@ class _CompoundBlock(object):
                 type='Rbd block',
                 description=o.description)
             if o.instances > 1:
+                blocks = [_RbdBlock(**kwargs, instance=i)
+                          for i in range(1, o.instances + 1)]
+                ids = [b.id for b in blocks]
                 if logic is None:
-                    for i in range(1, o.instances + 1):
-                        b = _RbdBlock(**kwargs, instance=i)
-                        diagram.add_node(b.id, obj=b)
+                    diagram.add_nodes_from((b.id, dict(obj=b)) for b in blocks)
                 elif logic == 'and':
-                    for i, j in window(range(1, o.instances + 1), 2):
-                        b1 = _RbdBlock(**kwargs, instance=i)
-                        b2 = _RbdBlock(**kwargs, instance=j)
-                        diagram.add_node(b1.id, obj=b1)
-                        diagram.add_node(b2.id, obj=b2)
-                        diagram.add_edge(b1.id, b2.id)
+                    # Chain the instances in series
+                    diagram.add_nodes_from((b.id, dict(obj=b)) for b in blocks)
+                    diagram.add_edges_from(zip(ids, ids[1:]))
                 elif logic in ('or', 'active', 'standby'):
                     pass
                 else:  # Invalid logic
-                    _logger.error('Leaf node %s has an invalid logic', o.name)
+                    _logger.error('Leaf node %s has an invalid logic',
+                                  dotted(o.name))
             else:
                 b = _RbdBlock(**kwargs)
                 diagram.add_node(b.id, obj=b)
             g.node[leaf].update(diagram=diagram)
 
-        def find_deepest_group(root):
-            """Find the deepest group in spec_graph, starting from root.
+        def groups_in_post_order(root):
+            """Return the groups of spec_graph, in merging order.
+
+            Each group comes after all the groups that it contains, so that
+            every group is merged exactly once, after its children.
 
-            Return the deepest group itself, its depth and its parent.
+            A single BFS traversal from root is needed, as it visits the
+            groups in non-decreasing depth order; reversing it yields the
+            deepest groups first.
             """
-            node, depth, parent = None, 0, None
-            for u, v in nx.dfs_edges(g, root):
-                if g.node[v]['obj'].type.lower() == 'group':
-                    d = nx.shortest_path_length(g, root, v)
-                    if d > depth:
-                        node, depth, parent = v, d, u
-            return node, depth, parent
+            groups = [
+                v for _, v in nx.bfs_edges(g, root)
+                if get_node_object(g, v).is_type('group')
+            ]
+            groups.reverse()
+            return groups
 
         def merge_group_diagrams(group_node):
             o = get_node_object(g, group_node)
             if o.logic is None and g.out_degree(group_node) > 1:
-                _logger.error('In Group element: %s,', o.name)
+                _logger.error('In Group element: %s,', dotted(o.name))
                 _logger.error('* element has no logic, but multiple children')
                 raise ExporterError('A Group element without logic ' +
                                     'cannot have multiple children')
@@ -207,7 +300,7 @@ class _CompoundBlock(object):
                                nodes_to_merge)
             with_hint = list(with_hint)
             if len(with_hint) > 1:
-                _logger.warning('In Group element: %s,', o.name)
+                _logger.warning('In Group element: %s,', dotted(o.name))
                 _logger.warning(
                     '* encountered more than one children with hint')
             for x in with_hint:
@@ -217,7 +310,7 @@ class _CompoundBlock(object):
             # Start building merged diagram
             diagram = nx.DiGraph(**GRAPH_ATTRIBUTES)
             if o.logic is None:
-                _logger.error('In Group element: %s', o.name)
+                _logger.error('In Group element: %s', dotted(o.name))
                 _logger.error('* tried to merge the children of a Group ' +
                               'without logic')
                 raise NotImplementedError(
@@ -255,27 +348,27 @@ class _CompoundBlock(object):
             In simple words, re-label each node of the given diagram, so that
             they correspond to a particular instance of that diagram.
 
-            A copy is returned, thus the given diagram remains untouched.
+            The complete old -> new node mapping is computed first and then
+            applied at once, by building a new diagram with copies of the
+            node objects, thus the given diagram remains untouched.
             """
-            d = diagram.copy()  # Copy the current diagram
+            mapping, objects = {}, []
             for name, nodelist in groupby(
-                    d.nodes_iter(), key=lambda x: get_node_object(d, x).name):
+                    diagram.nodes_iter(),
+                    key=lambda x: get_node_object(diagram, x).name):
                 nodelist = list(nodelist)
                 length = len(nodelist)
-                if length == 1:
-                    o = get_node_object(d, nodelist[0])
-                    old_id = o.id
-                    o.instance = instance + 1
-                    new_id = o.id
-                    nx.relabel_nodes(d, {old_id: new_id}, copy=False)
-                else:
-                    for i in range(length):
-                        o = get_node_object(d, nodelist[i])
-                        old_id = o.id
-                        current = o.instance
-                        o.instance = instance * length + current
-                        new_id = o.id
-                        nx.relabel_nodes(d, {old_id: new_id}, copy=False)
+                for n in nodelist:
+                    o = copy(get_node_object(diagram, n))
+                    if isinstance(o, _RbdBlock):
+                        o.instance = instance + 1 if length == 1 \
+                            else instance * length + o.instance
+                    mapping[n] = o.id
+                    objects.append(o)
+            d = nx.DiGraph(**GRAPH_ATTRIBUTES)
+            d.add_nodes_from((o.id, dict(obj=o)) for o in objects)
+            d.add_edges_from(
+                (mapping[u], mapping[v]) for u, v in diagram.edges_iter())
             return d
 
         def apply_failure_logic(group):
@@ -284,44 +377,34 @@ class _CompoundBlock(object):
             Called only after the grouped components have been merged.
             """
             d = g.node[group].get('diagram')
-
-            def has_nodes(name_id):
-                for n in d.nodes_iter():
-                    if get_node_object(d, n).name == name_id:
-                        return True
-                return False
-
-            r = next(filter(lambda x: f.in_degree(x) == 0, f.nodes_iter()))
-            for u, v in nx.dfs_edges(f, r):  # Start a DFS in failures graph
-                vo = get_node_object(f, v)  # Get the target object
-                if vo.is_type('FailureEvent'):
-                    uo = get_node_object(f, u)  # Get the source object
-                    if has_nodes(vo.name):
-                        # d contains nodes corresponding to the failure event
-                        _logger.debug('Will apply logic: %s, to: %s.%s',
-                                      uo.logic, self.name, vo.name)
-                        if uo.logic in ('or', 'active', 'standby'):
-                            # Determine vote value
-                            vote_val = None if uo.logic == 'or' \
-                                else int(uo.logic.voting)
-                            # Create output node for parallel connection
-                            node_out = _RbdNode('{}.Out'.format(self.name),
-                                                vote_val)
-                            d.add_node(node_out.id, obj=node_out)
-                            for n in filter(
-                                    lambda x:
-                                    get_node_object(d, x).name == vo.name,
-                                    d.nodes_iter()):
-                                no = get_node_object(d, n)
-                                # Assign standby mode according to logic
-                                no.standby_mode = logic_to_standby_mode(logic)
-                                d.add_edge(n, node_out.id)
-                        elif uo.logic == 'and':
-                            for n1, n2 in window(
-                                    filter(lambda x: x.name == vo.name,
-                                           d.nodes_iter()), 2):
-                                if n2 is not None:
-                                    d.add_edge(n1, n2)
+            # Index the diagram nodes by element (base) name
+            nodes_by_name = {}
+            for n in d.nodes_iter():
+                nodes_by_name.setdefault(get_node_object(d, n).name[-1],
+                                         []).append(n)
+
+            for vo, uo in failure_events:
+                nodes = nodes_by_name.get(vo.name)
+                if nodes:
+                    # d contains nodes corresponding to the failure event
+                    _logger.debug('Will apply logic: %s, to: %s.%s',
+                                  uo.logic, dotted(self.name), vo.name)
+                    if uo.logic in ('or', 'active', 'standby'):
+                        # Determine vote value
+                        vote_val = None if uo.logic == 'or' \
+                            else int(uo.logic.voting)
+                        # Create output node for parallel connection
+                        node_out = _RbdNode(self.name + ('Out',), vote_val)
+                        d.add_node(node_out.id, obj=node_out)
+                        for n in nodes:
+                            no = get_node_object(d, n)
+                            # Assign standby mode according to logic
+                            no.standby_mode = logic_to_standby_mode(uo.logic)
+                            d.add_edge(n, node_out.id)
+                    elif uo.logic == 'and':
+                        for n1, n2 in window(nodes, 2):
+                            if n2 is not None:
+                                d.add_edge(n1, n2)
 
         def finalize_graph(graph):
             """
@@ -341,15 +424,15 @@ class _CompoundBlock(object):
                 x for x in graph.nodes_iter() if graph.out_degree(x) == 0
             ]
             if len(entry_points) > 1:
-                entry_node_id = '{}.__ENTRY_POINT'.format(self.name)
+                entry_node_id = self.name + ('__ENTRY_POINT',)
                 entry_node = _RbdNode(entry_node_id, None)
                 graph.add_node(entry_node.id, obj=entry_node)
                 for point in entry_points:
                     graph.add_edge(entry_node.id, point)
             if len(exit_points) > 1:
-                exit_node_id = '{}.__EXIT_POINT'.format(self.name)
+                exit_node_id = self.name + ('__EXIT_POINT',)
                 exit_node = _RbdNode(exit_node_id, None)
-                graph.add_node(exit_node, obj=exit_node)
+                graph.add_node(exit_node.id, obj=exit_node)
                 for point in exit_points:
                     graph.add_edge(point, exit_node.id)
 
@@ -359,18 +442,15 @@ class _CompoundBlock(object):
         for _ in filter(lambda n: get_node_object(g, n).is_type('group'), g):
             # Handle grouped elements by using failures_graph
             _logger.debug('Component: %s, contains GROUPED components',
-                          self.name)
+                          dotted(self.name))
+            failure_hints, failure_events = index_failures()
             # For each leaf node, create its (temporary) diagram
             for leaf in filter(lambda x: g.out_degree(x) == 0, g.nodes_iter()):
                 look_for_hint(leaf)
                 create_basic_diagram(leaf)
-            # Start merging and raising nodes
-            while True:
-                if g.number_of_nodes() == 2:
-                    # Only the root node is left, we are done
-                    break
-                dg, dgd, dgp = find_deepest_group(root)
-                merge_group_diagrams(dg)
+            # Start merging and raising nodes, deepest groups first
+            for group in groups_in_post_order(root):
+                merge_group_diagrams(group)
             dg = next(g.neighbors_iter(root))
             apply_failure_logic(dg)
             ig = g.node[dg].get('diagram')
@@ -388,8 +468,8 @@ class _CompoundBlock(object):
                         ig.add_edge(b1.id, b2.id)
             elif logic in ('or', 'active', 'standby'):
                 vote_val = None if logic == 'or' else int(logic.voting)
-                node_in = _RbdNode('{}.{}'.format(self.name, 'In'), None)
-                node_out = _RbdNode('{}.{}'.format(self.name, 'Out'), vote_val)
+                node_in = _RbdNode(self.name + ('In',), None)
+                node_out = _RbdNode(self.name + ('Out',), vote_val)
                 ig.add_node(node_in.id, obj=node_in)
                 ig.add_node(node_out.id, obj=node_out)
                 for b in enumerate_blocks(root):
@@ -400,13 +480,44 @@ class _CompoundBlock(object):
 
         finalize_graph(ig)
         self._block_graph = ig
-        temp = nx.drawing.nx_pydot.to_pydot(ig)
-        self._dot_graph = pydotplus.graph_from_dot_data(temp.create_dot())
         # import os
         # p = nx.drawing.nx_pydot.to_pydot(ig)
         # output_path = os.path.join(os.path.expanduser('~'), 'tmp', '{}.png')
         # p.write_png(output_path.format(self.name))
 
+    def instantiate(self, block, mapping):
+        """Generate the internal graph as an instance of another block's one.
+
+        block must have been generated from a specification with the same
+        fingerprint as the specification of self (see spec_fingerprint).
+        mapping maps the element names of the block specification to the
+        corresponding element names of the specification of self.
+        """
+        prefix = block.name
+
+        def rename(name):
+            if name in mapping:
+                return mapping[name]
+            elif (len(name) > len(prefix) and
+                  name[:len(prefix)] == prefix):  # Node named after block
+                return self.name + name[len(prefix):]
+            return name
+
+        bg = block.internal_graph
+        ig = nx.DiGraph(**GRAPH_ATTRIBUTES)
+        ids = {}
+        for n in bg.nodes_iter():
+            o = get_node_object(bg, n)
+            if isinstance(o, _RbdBlock):
+                no = _RbdBlock(rename(o.name), o.code, o.type, o.description,
+                               o.instance, o.standby_mode)
+            else:
+                no = _RbdNode(rename(o.name), o.vote_value)
+            ids[n] = no.id
+            ig.add_node(no.id, obj=no)
+        ig.add_edges_from((ids[u], ids[v]) for u, v in bg.edges_iter())
+        self._block_graph = ig
+
     @property
     def name(self):
         return self._name
@@ -415,18 +526,63 @@ class _CompoundBlock(object):
     def code(self):
         return self._code
 
+    @property
+    def fingerprint(self):
+        """str: the structural fingerprint of the internal graph."""
+        if self._fingerprint is None:
+            self._fingerprint = structural_fingerprint(self._block_graph)
+        return self._fingerprint
+
     @property
     def internal_graph(self):
         return self._block_graph
 
     @property
-    def internal_dot_graph(self):
-        return self._dot_graph
+    def elements(self):
+        """list: the internal graph objects, in topological order."""
+        if self._elements is None:
+            ig = self._block_graph
+            self._elements = [
+                ig.node[n].get('obj') for n in nx.topological_sort(ig)
+            ]
+        return self._elements
+
+    @property
+    def connections(self):
+        """list: the internal graph edges, as (source, target) objects."""
+        if self._connections is None:
+            ig = self._block_graph
+            self._connections = [(ig.node[u].get('obj'), ig.node[v].get('obj'))
+                                 for u, v in ig.edges_iter()]
+        return self._connections
+
+    def local_id(self, element):
+        """Return the identifier of element, relative to the block page."""
+        try:
+            return self._local_ids[element.id]
+        except KeyError:
+            local_id = '.'.join(
+                str(x)
+                for x in local_tokens(element, getattr(element, 'instance',
+                                                       None)))
+            self._local_ids[element.id] = local_id
+            return local_id
+
+    @property
+    def positions(self):
+        return self._positions
+
+    @positions.setter
+    def positions(self, positions):
+        self._positions = positions
 
 
 class _RbdBlock(object):
     """Class modelling an RBD block instance."""
 
+    __slots__ = ('_name', '_code', '_type', '_description', '_instance',
+                 '_standby_mode')
+
     def __init__(self, name, code, type,
                  description=None, instance=None, standby_mode=None):
         self._name = name
@@ -436,9 +592,18 @@ class _RbdBlock(object):
         self._instance = instance
         self._standby_mode = standby_mode
 
+    def __copy__(self):
+        other = _RbdBlock.__new__(_RbdBlock)
+        other._name = self._name
+        other._code = self._code
+        other._type = self._type
+        other._description = self._description
+        other._instance = self._instance
+        other._standby_mode = self._standby_mode
+        return other
+
     def __str__(self):
-        return '{}.{}'.format(self.name, self.instance) \
-            if self._instance is not None else str(self.name)
+        return dotted(self.id)
 
     @property
     def name(self):
@@ -446,7 +611,8 @@ class _RbdBlock(object):
 
     @property
     def id(self):
-        return str(self)
+        return self._name + (self._instance,) \
+            if self._instance is not None else self._name
 
     @property
     def code(self):
@@ -483,12 +649,17 @@ class _RbdNode(object):
     Only for internal use in this module.
     """
 
+    __slots__ = ('_name', '_vote_value')
+
     def __init__(self, name, vote_value=None):
         self._name = name
         self._vote_value = vote_value
 
+    def __copy__(self):
+        return _RbdNode(self._name, self._vote_value)
+
     def __str__(self):
-        return str(self.name)
+        return dotted(self.name)
 
     @property
     def name(self):
@@ -496,7 +667,7 @@ class _RbdNode(object):
 
     @property
     def id(self):
-        return str(self)
+        return self._name
 
     @property
     def code(self):
@@ -517,195 +688,236 @@ class _RbdNode(object):
 class Rbd(object):
     """Class modelling the reliability block diagram (RBD)."""
 
-    def __init__(self):
-        """Initialize Rbd."""
+    def __init__(self, layout_engine=LAYOUT_ENGINES[0], layout_cache=None):
+        """Initialize Rbd.
+
+        Args:
+            layout_engine (str): The engine used to lay out the diagrams of
+                the compound blocks (see the layout module).
+            layout_cache (LayoutCache): The persistent layout cache to read
+                coordinates from and store coordinates to, or None.
+        """
         self._compound_block_index = OrderedDict()
+        self._layout_engine = layout_engine
+        self._layout_cache = layout_cache
 
     def from_ir_container(self, ir_container):
         """Construct the RBD graph from the IR container provided."""
         _logger.info('Creating Isograph RBD')
-        component_graph = ir_container.component_graph
-        failures_graph = ir_container.failures_graph
-        self._construct_compound_blocks(component_graph, failures_graph)
-
-    def _construct_compound_blocks(self, component_graph, failures_graph):
-        g = component_graph
-        f = failures_graph
-
-        def extract_subgraph(node):
-            # Given a compound node, extracts the compound component related
-            # sub-graph that determines the component's internal structure.
-            # Really dummy algorithm, can be improved a lot in terms of speed.
-            subgraph = nx.DiGraph()
-            fringe = []
-            for src, dst in nx.bfs_edges(g, source=node):
-                for node in fringe:
-                    if nx.has_path(g, node, dst):
-                        break
-                else:
-                    subgraph.add_edge(src, dst)
-                if get_node_object(g, dst).is_type('compound'):
-                    fringe.append(dst)
-            for n in filter(lambda x: x in g, subgraph):
-                subgraph.node[n].update(obj=get_node_object(g, n))
-            return subgraph
-
-        def extract_failures_subgraph(node):
-            for cc in nx.weakly_connected_component_subgraphs(f):
-                root = nx.topological_sort(cc)[0]
-                _, rkey = root.split('_')
-                if rkey == node:
-                    return cc
-
-        root = nx.topological_sort(g)[0]
-        for n in itertools.chain([root],
-                                 (x for _, x in nx.bfs_edges(g, source=root))):
-            # Traverse the components graph in BFS order.
-            # For each compound element, create the internal graph.
-            ndo = get_node_object(g, n)
-            if ndo.is_type('compound'):
-                _logger.debug('Constructing internal graph for: %s%s',
-                              ndo.name, ' (' + ndo.description + ')'
-                              if ndo.description else '')
-                block = _CompoundBlock(ndo.name, ndo.code)
-                node_subgraph = extract_subgraph(n)
-                failures_subgraph = extract_failures_subgraph(
-                    ndo.description if ndo.description else n)
-                block.generate_internal_graph(node_subgraph, failures_subgraph)
-                # export_graph_to_png(block.internal_graph, ndo.name)
-                self._compound_block_index[block.name] = block
+        self._construct_compound_blocks(ir_container)
+        self._layout_compound_blocks()
+
+    def _construct_compound_blocks(self, ir_container):
+        # Specification fingerprint -> (generated block, element names)
+        generated = {}
+
+        # Traverse the components in BFS order.
+        # For each compound element, create the internal graph.
+        for n, node_subgraph in compound_subgraphs(
+                ir_container.iter_components()):
+            ndo = get_node_object(node_subgraph, n)
+            _logger.debug('Constructing internal graph for: %s%s',
+                          dotted(ndo.name), ' (' + ndo.description + ')'
+                          if ndo.description else '')
+            block = _CompoundBlock(ndo.name, ndo.code)
+            failures_key = ndo.description if ndo.description else n[-1]
+            fingerprint = spec_fingerprint(node_subgraph, failures_key)
+            names = [get_node_object(node_subgraph, x).name
+                     for x in node_subgraph.nodes_iter()]
+            if fingerprint in generated:
+                # Same structure as an already generated block (e.g. both
+                # are instances of the same template), reuse its graph.
+                gblock, gnames = generated[fingerprint]
+                block.instantiate(gblock, dict(zip(gnames, names)))
+            else:
+                failures_subgraph = ir_container.failures_subgraph(
+                    failures_key)
+                block.generate_internal_graph(node_subgraph,
+                                              failures_subgraph)
+                generated[fingerprint] = (block, names)
+            # export_graph_to_png(block.internal_graph, ndo.name)
+            self._compound_block_index[block.name] = block
+
+    def _layout_compound_blocks(self):
+        """Lay out the internal graphs of all compound blocks.
+
+        All internal graphs are handed to the layout engine at once, so that
+        engines with a high invocation cost (i.e. graphviz) are run only once.
+        Only one internal graph per structural fingerprint is laid out; blocks
+        with the same fingerprint share its coordinates. If a layout cache is
+        in use, coordinates found in the cache are not computed again.
+        """
+        engine = self._layout_engine
+        cache = self._layout_cache
+        blocks = list(self._compound_block_index.values())
+        distinct = OrderedDict()  # fingerprint -> block to lay out
+        for block in blocks:
+            distinct.setdefault(block.fingerprint, block)
+        coordinates = {}  # fingerprint -> coordinates, in node insertion order
+        if cache is not None:
+            for fingerprint in distinct:
+                cached = cache.get(engine, fingerprint)
+                if cached is not None:
+                    coordinates[fingerprint] = cached
+            _logger.info('Layout cache: %d hits, %d misses (total)',
+                         cache.hits, cache.misses)
+        missing = OrderedDict((fingerprint, b)
+                              for fingerprint, b in distinct.items()
+                              if fingerprint not in coordinates)
+        _logger.info('Laying out %d distinct RBD diagrams out of %d '
+                     '(engine: %s)', len(missing), len(blocks), engine)
+        layouts = compute_layouts(
+            (b.internal_graph for b in missing.values()), engine)
+        for (fingerprint, b), positions in zip(missing.items(), layouts):
+            coordinates[fingerprint] = [
+                positions[n] for n in b.internal_graph.nodes_iter()
+            ]
+            if cache is not None:
+                cache.put(engine, fingerprint, coordinates[fingerprint])
+        if cache is not None:
+            cache.evict()
+        for block in blocks:
+            block.positions = dict(
+                zip(block.internal_graph.nodes_iter(),
+                    coordinates[block.fingerprint]))
 
     def serialize(self, emitter):
-        """Serialize the RBD by making use of the given emitter object."""
+        """Serialize the RBD by making use of the given emitter object.
+
+        Rows are handed over to the emitter as soon as they are produced.
+        """
         _logger.info('Serializing components')
+        for sheet, row in self.rows():
+            emitter.add_row(sheet, **row)
+
+    def rows(self):
+        """Generate the output rows of the RBD, one compound block at a time.
+
+        Yield (sheet, row) tuples, where sheet is the output sheet name
+        (see rows.SCHEMA) and row is a dict with the emitter arguments.
+        All blocks and nodes of a page precede its connections.
+
+        Every compound block (e.g. each instance of a template component)
+        is serialized in full, as a distinct physical component. Repeat
+        blocks are not used: Isograph considers a repeat block to be the
+        very same block as the one it references, while the components of
+        the model never share a physical component.
+        """
         name, element = next(iter(self._compound_block_index.items()))
-        blocks_stack = deque([(element, deque(), None)])
+        blocks_stack = deque([(element, (), None)])
         while blocks_stack:
             cblock, cpath, cinstance = blocks_stack.pop()
+            frame = _Frame(cblock, cpath, cinstance)
+            # The path of the children is shared by all of them
+            npath = cpath + (cinstance,) if cinstance is not None else cpath
             # For each node (block) N in the current block, serialise N.
             # If it is a compound block, also add it to the stack.
-            for u in nx.topological_sort(cblock.internal_graph):
-                uo = cblock.internal_graph.node[u].get('obj')
-                npath = cpath
-                if cinstance is not None:
-                    npath = npath.copy()
-                    npath.append(cinstance)
+            for uo in cblock.elements:
                 if uo.name in self._compound_block_index:
                     nblock = self._compound_block_index[uo.name]
                     blocks_stack.append((nblock, npath, uo.instance))
-                self._serialize_element(uo, cblock, cpath, cinstance, emitter)
+                yield self._element_row(uo, frame)
             # For each edge (u, v) in the current block,
             # serialise (u, v) as an RbdConnection.
-            for u, v in nx.edges_iter(cblock.internal_graph):
-                uo = cblock.internal_graph.node[u].get('obj')
-                vo = cblock.internal_graph.node[v].get('obj')
-                self._serialize_connection(cblock, cpath, cinstance, uo, vo,
-                                           emitter)
+            for uo, vo in cblock.connections:
+                yield self._connection_row(frame, uo, vo)
 
     @staticmethod
-    def _serialize_element(element, parent, ppath, pinstance, emitter):
-        """Serialize a single element."""
-        dot_graph = parent.internal_dot_graph
-
-        def quote_if_necessary(element_id):
-            return element_id if str.isalnum(element_id) \
-                else '"{}"'.format(element.id)
-
-        def coordinates():
-            s = quote_if_necessary(element.id)
-            cx, cy = dot_graph.get_node(s)[0].get_pos().strip('"').split(',')
-            return int(float(cx)), int(float(cy))
-
-        def parent_tokens():
-            prefix = ppath  # The parent path, as is
-            name = parent.name  # Set to parent name initially
-            instance = 0 if not pinstance else pinstance
-            if getattr(parent, 'code', None) and parent.code:
-                name = parent.code.format(instance=instance)
-                if name != parent.code:
-                    instance = None
-            return [x for x in chain(prefix, [name], [instance]) if x]
-
-        def element_tokens():
-            prefix = list(ppath)
-            if pinstance:
-                prefix.append(pinstance)
-            name = element.name
-            instance = 0 if not getattr(element, 'instance', None) or \
-                not element.instance else element.instance
-            if getattr(element, 'code', None) and element.code:
-                name = element.code.format(instance=instance)
-                if name != element.code:
-                    instance = None
-            return [x for x in chain(prefix, [name], [instance]) if x]
-
+    def _element_row(element, frame):
+        """Return the output row of a single element."""
         # get element coordinates
-        xpos, ypos = coordinates()
+        xpos, ypos = frame.block.positions[element.id]
 
-        # Add block/node to emitter
-        kwargs = {  # Common block/node attributes
-            'Id': '.'.join(str(x) for x in element_tokens()),
-            'Page': '.'.join(str(x) for x in parent_tokens()),
+        row = {  # Common block/node attributes
+            'Id': frame.element_id(element),
+            'Page': frame.page,
             'XPosition': xpos * 1.75,
             'YPosition': ypos * 1.75,
         }
-        if type(element) == _RbdBlock:  # Specific attributes for RBD blocks
-            kwargs['Description'] = element.description
-            kwargs['StandbyMode'] = element.standby_mode
-            emitter.add_block(**kwargs)
+        if isinstance(element, _RbdBlock):  # RBD block attributes
+            row['Description'] = element.description
+            row['StandbyMode'] = element.standby_mode
+            return 'RbdBlocks', row
         else:  # Specific attributes for RBD nodes
-            kwargs['Vote'] = element.vote_value
-            emitter.add_node(**kwargs)
-
-        return
+            row['Vote'] = element.vote_value
+            return 'RbdNodes', row
 
     @staticmethod
-    def _serialize_connection(parent, ppath, pinstance, src, dst, emitter):
-        def make_path():
-            p = ppath
-            return '.'.join([str(t) for t in p]) + '.' \
-                if len(p) > 1 else str(p[0]) + '.' if len(p) == 1 else ''
-
-        def parent_tokens():
-            prefix = ppath  # The parent path, as is
-            name = parent.name  # Set to parent name initially
-            instance = 0 if not pinstance else pinstance
-            if getattr(parent, 'code', None) and parent.code:
-                name = parent.code.format(instance=instance)
-                if name != parent.code:
-                    instance = None
-            return [x for x in chain(prefix, [name], [instance]) if x]
-
-        def element_tokens(n):
-            prefix = list(ppath)
-            if pinstance:
-                prefix.append(pinstance)
-            name = n.name
-            instance = 0 if not getattr(n, 'instance', None) or \
-                not n.instance else n.instance
-            if getattr(n, 'code', None) and n.code:
-                name = n.code.format(instance=instance)
-                if name != n.code:
-                    instance = None
-            return [x for x in chain(prefix, [name], [instance]) if x]
-
-        parent_id = '.'.join(str(x) for x in parent_tokens())
-        src_id = '.'.join(str(x) for x in element_tokens(src))
-        dst_id = '.'.join(str(x) for x in element_tokens(dst))
-
-        prefix = make_path()
-        if prefix and pinstance is not None:
-            prefix = '{}{}.'.format(prefix, pinstance)
-        elif pinstance is not None:
-            prefix = '{}.'.format(pinstance)
-        identifier = '{}{}-{}'.format(prefix, src.id, dst.id)
-        emitter.add_connection(identifier, parent_id, src_id, src.type, dst_id,
-                               dst.type)
+    def _connection_row(frame, src, dst):
+        """Return the output row of a single connection."""
+        identifier = '{}{}-{}'.format(frame.connection_prefix, src, dst)
+        return 'RbdConnections', dict(identifier=identifier, page=frame.page,
+                                      src_id=frame.element_id(src),
+                                      src_type=src.type,
+                                      dst_id=frame.element_id(dst),
+                                      dst_type=dst.type)
+
+
+def local_tokens(element, instance):
+    """Return the identifier tokens of element, relative to its page.
+
+    If the element has a code, the code formatted with the instance number
+    is used, otherwise the element name followed by the instance number.
+    """
+    name = dotted(element.name)
+    instance = instance if instance else 0
+    if element.code:
+        name = element.code.format(instance=instance)
+        if name != element.code:
+            instance = None
+    return [x for x in (name, instance) if x]
+
+
+class _Frame(object):
+    """Class modelling the serialization frame of a compound block instance.
+
+    Holds the identifier prefixes shared by all the elements and connections
+    of a compound block instance, so that they are computed only once.
+
+    Only for internal use in this module.
+    """
+
+    def __init__(self, block, path, instance):
+        self._block = block
+        # Element identifiers are prefixed by the path and instance
+        self._id_prefix = '.'.join(
+            str(x) for x in chain(path, [instance]) if x)
+        # The page is the identifier of the block instance itself
+        self._page = '.'.join(
+            str(x) for x in chain(path, local_tokens(block, instance)) if x)
+        self._connection_prefix = ''.join(
+            '{}.'.format(x) for x in chain(
+                path, [instance] if instance is not None else []))
+        self._ids = {}  # element id -> output identifier
+
+    def element_id(self, element):
+        """Return the output identifier of element within the frame."""
+        try:
+            return self._ids[element.id]
+        except KeyError:
+            identifier = '.'.join(
+                x for x in (self._id_prefix, self._block.local_id(element))
+                if x)
+            self._ids[element.id] = identifier
+            return identifier
+
+    @property
+    def block(self):
+        return self._block
+
+    @property
+    def page(self):
+        return self._page
+
+    @property
+    def connection_prefix(self):
+        return self._connection_prefix
 
 
 # DEBUG
 def export_graph_to_png(g, name):
     """Debug assistant method."""
+    import pydotplus
     p = nx.drawing.nx_pydot.to_pydot(g)
     t = pydotplus.graph_from_dot_data(p.create_dot())
     t.write_png('/home/ergys/tmp/{}.png'.format(name))
@@ -19,8 +19,11 @@ In order to define new loaders, the following steps are required:
        loader, based on the former. Assign your handler to your sub-parser
        by invoking the set_defaults method on your sub-parser (see current code
        as reference).
+    4. Register your loader module in LOADERS below, so that it is imported
+       only when your input type is selected.
 """
 import enum
+import importlib
 import logging
 
 from amtt.errors import LoaderError
@@ -126,5 +129,27 @@ class Loader(object):
             yield definition
 
 
+# Input type -> loader module.
+# Loader modules are imported only when needed, as they may depend on heavy
+# third-party packages (e.g. pyexcel).
+LOADERS = {
+    'csv': 'amtt.loader.csv',
+    'excel': 'amtt.loader.excel',
+}
+
+
+def lazy_handler(input_type):
+    """Return the argparse handler function of the given input type.
+
+    The loader module is imported when the handler is first called.
+    """
+    module_name = LOADERS[input_type]
+
+    def handler(args):
+        return importlib.import_module(module_name).handler(args)
+
+    return handler
+
+
 # Contains all available loaders.
 __all__ = ['csv', 'excel']
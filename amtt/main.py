@@ -9,9 +9,24 @@ import os
 import sys
 
 from amtt.coloredtty import ColorizingStreamHandler
-from amtt.loader import *
+from amtt.loader import lazy_handler
 
-from amtt.translator import Translator
+# Exporter specific options, along with their default values.
+# The defaults apply whenever an option is not set (e.g. when running the UI).
+EXPORTER_OPTIONS = {
+    'output_format': 'xml',
+    'layout_engine': 'builtin',
+    'layout_cache': False,
+    'layout_cache_dir': None,
+    'layout_cache_size': None,  # None: layout_cache.DEFAULT_CACHE_SIZE
+    'clear_layout_cache': False,
+    'streaming': False,
+    'compact': False,
+    'compress': False,
+    'csv_delimiter': ',',
+    'lazy_templates': False,
+    'compact_graphs': False,
+}
 
 
 def detect_graphviz():
@@ -39,6 +54,25 @@ def detect_graphviz():
     os.environ['PATH'] += ';' + graphviz_path
 
 
+def csv_delimiter(value):
+    """Argument type for the CSV output delimiter."""
+    value = '\t' if value == 'tab' else value
+    if len(value) != 1:
+        raise argparse.ArgumentTypeError('must be one character or "tab"')
+    return value
+
+
+def positive_int(value):
+    """Argument type for the positive integer options."""
+    try:
+        value = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('must be an integer')
+    if value < 1:
+        raise argparse.ArgumentTypeError('must be positive')
+    return value
+
+
 def parse_arguments():
     # parse arguments
     parser = argparse.ArgumentParser(
@@ -70,6 +104,82 @@ def parse_arguments():
         default=0,
         dest='export_png',
         help='Export input model graphs as PNG images and exit')
+    parser.add_argument(
+        '-f',
+        '--format',
+        type=str,
+        action='append',
+        choices=['xml', 'xlsx', 'xls', 'csv', 'sqlite'],
+        metavar='FORMAT',
+        dest='output_format',
+        help='The output file format: xml (default), xlsx, xls, csv or '
+        'sqlite. Repeat to write several formats in one run')
+    parser.add_argument(
+        '--layout',
+        type=str,
+        choices=['builtin', 'graphviz'],
+        default=EXPORTER_OPTIONS['layout_engine'],
+        metavar='ENGINE',
+        dest='layout_engine',
+        help='The diagram layout engine: builtin (default) or graphviz')
+    parser.add_argument(
+        '--layout-cache',
+        action='store_true',
+        dest='layout_cache',
+        help='Reuse diagram layouts computed in previous runs')
+    parser.add_argument(
+        '--layout-cache-dir',
+        type=str,
+        metavar='DIR',
+        dest='layout_cache_dir',
+        help='The layout cache directory (implies --layout-cache)')
+    parser.add_argument(
+        '--layout-cache-size',
+        type=positive_int,
+        default=EXPORTER_OPTIONS['layout_cache_size'],
+        metavar='MB',
+        dest='layout_cache_size',
+        help='The layout cache size cap, in megabytes (default: the '
+        'built-in cap of the layout cache; implies --layout-cache)')
+    parser.add_argument(
+        '--clear-layout-cache',
+        action='store_true',
+        dest='clear_layout_cache',
+        help='Clear the layout cache before translating')
+    parser.add_argument(
+        '--lazy-templates',
+        action='store_true',
+        dest='lazy_templates',
+        help='Expand the template components while exporting, instead of '
+        'when loading the model (lower memory usage)')
+    parser.add_argument(
+        '--compact-graphs',
+        action='store_true',
+        dest='compact_graphs',
+        help='Keep the components graph in compact, array-backed form, '
+        'instead of a networkx graph (lower memory usage)')
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        dest='streaming',
+        help='Write the output rows as they are produced (lower memory usage)')
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        dest='compact',
+        help='Do not pretty print the output XML file')
+    parser.add_argument(
+        '--gzip',
+        action='store_true',
+        dest='compress',
+        help='Compress the output file(s) with gzip (xml and csv only)')
+    parser.add_argument(
+        '--delimiter',
+        type=csv_delimiter,
+        default=EXPORTER_OPTIONS['csv_delimiter'],
+        metavar='CHAR',
+        dest='csv_delimiter',
+        help='The CSV output field delimiter (default: ","), "tab" for tab')
 
     subparsers = parser.add_subparsers(title='Supported input types')
 
@@ -83,7 +193,7 @@ def parse_arguments():
         dest='dir_in',
         help='The directory to read CSV files from')
     # set handler function - will be called whenever the csv option is selected
-    csv_parser.set_defaults(func=csv.handler)
+    csv_parser.set_defaults(func=lazy_handler('csv'))
 
     # sub-parser for Excel data source
     excel_parser = subparsers.add_parser('excel', help='Microsoft Excel input')
@@ -95,7 +205,7 @@ def parse_arguments():
         dest='excel_in',
         help='The XLS file containing the model definition')
     # set handler function - will be called whenever the xls option is selected
-    excel_parser.set_defaults(func=excel.handler)
+    excel_parser.set_defaults(func=lazy_handler('excel'))
 
     # add subparsers for your own data sources here...
 
@@ -111,6 +221,11 @@ def parse_arguments():
             'Missing required argument: TARGET\nRe-run with -h for help.',
             file=sys.stderr)
         sys.exit(1)
+    if (args.layout_cache_dir is not None or
+            args.layout_cache_size is not None):
+        args.layout_cache = True
+    if args.output_format is None:
+        args.output_format = [EXPORTER_OPTIONS['output_format']]
     return args
 
 
@@ -132,14 +247,28 @@ def main():
     sys.exit(0)
 
 
+def exporter_options(args):
+    """Return the exporter specific options found in args."""
+    return {
+        option: getattr(args, option, default)
+        for option, default in EXPORTER_OPTIONS.items()
+    }
+
+
 def execute(args):
+    # The translator (and its dependencies) is imported only when needed
+    from amtt.translator import Translator
     # call the appropriate handler for the input type
     # and get the appropriate loader
     loader = args.func(args)
     # create the Translator and start the process
-    translator = Translator(loader, args.target, args.output_basedir)
+    options = exporter_options(args)
+    translator = Translator(loader, args.target, args.output_basedir,
+                            **options)
     translator.parse_model()
-    detect_graphviz()
+    if args.export_png > 0 or options['layout_engine'] == 'graphviz':
+        # Graphviz is only needed for the graph images and graphviz layouts
+        detect_graphviz()
     if args.export_png > 0:  # Positive value means "also export model graphs"
         translator.export_png()
     if args.export_png > 1:  # Value > 1 means "only export model graphs"
@@ -2,9 +2,7 @@
 
 import logging
 
-from amtt.errors import ExporterError
-
-from amtt.exporter.isograph import IsographExporter
+from amtt.exporter import exporter_class
 from .ir import IRContainer
 from .rows import RowsContainer
 
@@ -14,18 +12,22 @@ _logger = logging.getLogger(__name__)
 class Translator(object):
     """The translator class."""
 
-    def __init__(self, loader, target, output_basedir):
+    def __init__(self, loader, target, output_basedir, **options):
         """Initialize the translator.
 
         Args:
             loader (Loader): A loader instance, used to provide the input.
             target (string): The target software to export to.
+            options: Exporter specific options (e.g. layout_engine).
         """
         self._loader = loader
         self._target = target
         self._output_basedir = output_basedir
+        self._options = options
         # Initialize the IR Container
-        self._ir_container = IRContainer()
+        self._ir_container = IRContainer(
+            lazy_templates=options.get('lazy_templates', False),
+            compact_graphs=options.get('compact_graphs', False))
 
     def parse_model(self):
         """Construct the in-memory model.
@@ -62,6 +64,11 @@ class Translator(object):
         """str: the output directory."""
         return self._output_basedir
 
+    @property
+    def options(self):
+        """dict: the exporter specific options."""
+        return self._options
+
     @property
     def ir_container(self):
         """IRContainer: the IR container object of the translator."""
@@ -72,9 +79,13 @@ class ExporterFactory(object):
     """Factory for back-end exporters."""
 
     @staticmethod
-    def get_exporter(caller):
-        """Construct and return the appropriate exporter."""
-        if caller.target.lower() == 'isograph':
-            return IsographExporter(caller)
-        else:
-            raise ExporterError('Unknown target: {}'.format(caller.target))
+    def get_exporter(caller, emitters=None):
+        """Construct and return the appropriate exporter.
+
+        Args:
+            caller (Translator): The translator.
+            emitters (list): Optional, the emitters to write the output to.
+                If None, the exporter creates its own emitters, according
+                to the translator options.
+        """
+        return exporter_class(caller.target)(caller, emitters=emitters)
@@ -0,0 +1,272 @@
+"""Compact (array-backed) representation of static directed graphs.
+
+A networkx graph keeps a few dicts per node (its attributes, successors and
+predecessors), which dominate the memory needed for large graphs, such as the
+components graph of a model with many template component instances, and are
+traversed at the Python level anyway.
+
+A CompactGraph has integer node ids (0 to n - 1) and keeps the edges in CSR
+(compressed sparse row) form: the successors of node i are found at
+targets[offsets[i]:offsets[i + 1]], where offsets and targets are arrays of
+C integers, and likewise for the predecessors. The node attributes are kept
+in columns, i.e. lists indexed by node id. The structure of the graph cannot
+be changed once created; only its columns can.
+"""
+
+from array import array
+from collections import deque
+
+import networkx as nx
+
+# The array type code of node ids and offsets (C int)
+ID_TYPECODE = 'i'
+
+
+def _csr(adjacency):
+    """Return the (offsets, targets) arrays of the given adjacency lists."""
+    offsets = array(ID_TYPECODE, [0])
+    targets = array(ID_TYPECODE)
+    for nodes in adjacency:
+        targets.extend(nodes)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+def _transpose(offsets, targets):
+    """Return the (offsets, targets) arrays of the transposed graph.
+
+    The predecessors of each node are ordered by node id.
+    """
+    n = len(offsets) - 1
+    counts = array(ID_TYPECODE, [0]) * (n + 1)
+    for v in targets:
+        counts[v + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    t_offsets = array(ID_TYPECODE, counts)
+    t_targets = array(ID_TYPECODE, [0]) * len(targets)
+    for u in range(n):
+        for v in targets[offsets[u]:offsets[u + 1]]:
+            t_targets[counts[v]] = u
+            counts[v] += 1
+    return t_offsets, t_targets
+
+
+class CompactGraph(object):
+    """A static directed graph, with array-backed structure and attributes.
+
+    The traversal methods follow their networkx counterparts, so that both
+    representations yield the nodes (and edges) in the same order.
+    """
+
+    __slots__ = ('graph', '_succ', '_pred', '_columns')
+
+    def __init__(self, successors, columns=None, **attr):
+        """Initialize CompactGraph.
+
+        Args:
+            successors (iterable): The successors of each node, in node id
+                order, as iterables of node ids.
+            columns (dict): Optional, the node attribute columns, i.e. name
+                -> list of values, indexed by node id.
+            attr: The graph attributes.
+        """
+        self.graph = dict(attr)
+        self._succ = _csr(successors)
+        self._pred = _transpose(*self._succ)
+        self._columns = {}
+        for name, values in (columns or {}).items():
+            self.add_column(name, values)
+
+    def __len__(self):
+        return len(self._succ[0]) - 1
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def number_of_nodes(self):
+        """Return the number of nodes."""
+        return len(self)
+
+    def number_of_edges(self):
+        """Return the number of edges."""
+        return len(self._succ[1])
+
+    def successors(self, n):
+        """Return the successors of node n (array of node ids)."""
+        offsets, targets = self._succ
+        return targets[offsets[n]:offsets[n + 1]]
+
+    def predecessors(self, n):
+        """Return the predecessors of node n (array of node ids)."""
+        offsets, targets = self._pred
+        return targets[offsets[n]:offsets[n + 1]]
+
+    def out_degree(self, n):
+        """Return the number of successors of node n."""
+        offsets = self._succ[0]
+        return offsets[n + 1] - offsets[n]
+
+    def in_degree(self, n):
+        """Return the number of predecessors of node n."""
+        offsets = self._pred[0]
+        return offsets[n + 1] - offsets[n]
+
+    def edges(self):
+        """Iterate over the edges, as (u, v) tuples, in node id order."""
+        for u in self:
+            for v in self.successors(u):
+                yield u, v
+
+    def bfs_edges(self, source):
+        """Iterate over the edges of a breadth-first search from source."""
+        visited = {source}
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for v in self.successors(u):
+                if v not in visited:
+                    visited.add(v)
+                    queue.append(v)
+                    yield u, v
+
+    def bfs(self, source):
+        """Iterate over the nodes reachable from source, in BFS order."""
+        yield source
+        for _, v in self.bfs_edges(source):
+            yield v
+
+    def dfs_edges(self, source):
+        """Iterate over the edges of a depth-first search from source."""
+        visited = {source}
+        stack = [(source, iter(self.successors(source)))]
+        while stack:
+            u, children = stack[-1]
+            for v in children:
+                if v not in visited:
+                    visited.add(v)
+                    stack.append((v, iter(self.successors(v))))
+                    yield u, v
+                    break
+            else:
+                stack.pop()
+
+    def dfs_preorder(self, source):
+        """Iterate over the nodes reachable from source, in DFS pre-order."""
+        yield source
+        for _, v in self.dfs_edges(source):
+            yield v
+
+    def topological_sort(self):
+        """Return the nodes in topological order (list of node ids).
+
+        Follows networkx (1.x): a depth-first search is started from each
+        node, in node id order, and the order is the reverse of the order in
+        which the searches finish the nodes. Raise a ValueError if the graph
+        contains a cycle.
+        """
+        seen = set()
+        explored = set()
+        order = []
+        for source in self:
+            if source in explored:
+                continue
+            fringe = [source]
+            while fringe:
+                u = fringe[-1]
+                if u in explored:
+                    fringe.pop()
+                    continue
+                seen.add(u)
+                new_nodes = []
+                for v in self.successors(u):
+                    if v not in explored:
+                        if v in seen:
+                            raise ValueError('Graph contains a cycle')
+                        new_nodes.append(v)
+                if new_nodes:
+                    fringe.extend(new_nodes)
+                else:
+                    explored.add(u)
+                    order.append(u)
+                    fringe.pop()
+        order.reverse()
+        return order
+
+    def subgraph(self, nodes):
+        """Return the sub-graph induced by the given nodes.
+
+        The nodes of the sub-graph are numbered after their position in
+        nodes, and their attributes (columns) are copied.
+        """
+        nodes = list(nodes)
+        ids = {n: i for i, n in enumerate(nodes)}
+        successors = ([ids[v] for v in self.successors(u) if v in ids]
+                      for u in nodes)
+        columns = {name: [values[n] for n in nodes]
+                   for name, values in self._columns.items()}
+        return CompactGraph(successors, columns, **self.graph)
+
+    def column(self, name):
+        """Return the attribute column with the given name."""
+        return self._columns[name]
+
+    def add_column(self, name, values=None):
+        """Add (or replace) an attribute column and return it.
+
+        If values is None, the column is filled with None.
+        """
+        if values is None:
+            values = [None] * len(self)
+        elif type(values) is not list:
+            values = list(values)
+        if len(values) != len(self):
+            raise ValueError('Column {} has {} values for {} nodes'.format(
+                name, len(values), len(self)))
+        self._columns[name] = values
+        return values
+
+    def find(self, name, value):
+        """Return the (first) node with the given value in column name.
+
+        Raise a ValueError if there is no such node.
+        """
+        return self._columns[name].index(value)
+
+    def to_networkx(self, key=None):
+        """Return the graph as a networkx DiGraph.
+
+        The nodes are labeled by the values of the column key (or by their
+        ids, if key is None), which must be unique, and carry the rest of the
+        columns as attributes.
+        """
+        labels = self._columns[key] if key is not None else range(len(self))
+        columns = [(name, values) for name, values in self._columns.items()
+                   if name != key]
+        g = nx.DiGraph()
+        g.graph.update(self.graph)
+        g.add_nodes_from(
+            (labels[n], {name: values[n] for name, values in columns})
+            for n in self)
+        g.add_edges_from((labels[u], labels[v]) for u, v in self.edges())
+        return g
+
+    @classmethod
+    def from_networkx(cls, g, key=None):
+        """Return the CompactGraph of the given networkx DiGraph.
+
+        The nodes are numbered in the order of g.nodes_iter(). If key is
+        given, the nodes of g are kept in the column key. The node attributes
+        become columns (with None for the nodes that lack them).
+        """
+        nodes = g.nodes()
+        ids = {n: i for i, n in enumerate(nodes)}
+        names = []
+        for n in nodes:
+            names.extend(a for a in g.node[n] if a not in names)
+        columns = {name: [g.node[n].get(name) for n in nodes]
+                   for name in names}
+        if key is not None:
+            columns[key] = nodes
+        return cls(([ids[v] for v in g.successors_iter(n)] for n in nodes),
+                   columns, **g.graph)
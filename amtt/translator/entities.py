@@ -11,6 +11,9 @@ _logger = logging.getLogger(__name__)
 class SystemElement(object):
     """Class modelling a system element."""
 
+    __slots__ = ('_type', '_name', '_code', '_instances', '_parent',
+                 '_description', '_logic', '_failure_model')
+
     def __init__(self, type, name, parent, code, instances, description=None):
         """Initialize SystemElement."""
         self._type = type
@@ -22,9 +25,28 @@ class SystemElement(object):
         self._logic = None  # Only applicable to compound elements.
         self._failure_model = None  # Only applicable to basic elements.
 
+    def __copy__(self):
+        """Return a shallow copy of the object."""
+        other = SystemElement.__new__(SystemElement)
+        other._type = self._type
+        other._name = self._name
+        other._code = self._code
+        other._instances = self._instances
+        other._parent = self._parent
+        other._description = self._description
+        other._logic = self._logic
+        other._failure_model = self._failure_model
+        return other
+
     def __str__(self):
-        """Return the string representation of the object."""
-        return '{}_{}'.format(self.type, self.name)
+        """Return the string representation of the object.
+
+        Path names (tuples, see the unfold module) are rendered dotted.
+        """
+        name = self.name
+        if isinstance(name, tuple):
+            name = '.'.join(str(x) for x in name)
+        return '{}_{}'.format(self.type, name)
 
     def is_type(self, type_str):
         """Return True if self has the type indicated by type_str."""
@@ -32,8 +54,8 @@ class SystemElement(object):
 
     @property
     def id(self):
-        """str: unique ID for the system element."""
-        return '{}_{}'.format(self.type, self.name)
+        """tuple: unique ID for the system element, i.e. (type, name)."""
+        return (self.type, self.name)
 
     @property
     def type(self):
@@ -103,6 +125,8 @@ class SystemElement(object):
 class ElementLogic(object):
     """Class modelling an element logic."""
 
+    __slots__ = ('_name', '_voting', '_total')
+
     def __init__(self, raw_string):
         """Initialize ElementLogic."""
         tokens = re.split(r'[(,)]', raw_string)  # Parse raw string
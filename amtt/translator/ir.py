@@ -4,13 +4,17 @@ Can be considered as the Intermediate Representation (IR) of the translator.
 """
 
 import os
+import sys
 import logging
 import networkx as nx
 from collections import OrderedDict
 from copy import copy
+from itertools import chain, count
 
 from amtt.errors import TranslatorError
+from .compact import CompactGraph
 from .entities import SystemElement, ElementLogic, FailureModel
+from .unfold import unfold, walk
 
 _logger = logging.getLogger(__name__)
 
@@ -26,6 +30,16 @@ RAW_INPUT_GRAPH_FILENAME = 'raw_input.png'
 COMPONENT_GRAPH_FILENAME = 'components.png'
 FAILURES_GRAPH_FILENAME = 'failures.png'
 
+# The node of the ROOT component in the components graph
+ROOT = ('ROOT',)
+
+
+# Failure type (lower case) -> display name
+FAILURE_TYPES = {
+    'failurenode': 'FailureNode',
+    'failureevent': 'FailureEvent',
+}
+
 
 def is_template_def(row):
     """Return whether a row is a template (component) definition.
@@ -50,14 +64,23 @@ def is_failure(row):
 
     A row is a failure definition if its type is FailureNode or FailureEvent.
     """
-    t = row.type.lower()
-    return t in ('failurenode', 'failureevent')
+    return row.type.lower() in FAILURE_TYPES
+
 
+def _intern(name):
+    """Return the interned name (names that are not strings are kept)."""
+    return sys.intern(name) if isinstance(name, str) else name
 
-def component_basename(node):
-    """Given a component graph node, return its basename."""
-    tokens = node.split('.')
-    return tokens[-1]
+
+def dotted(node):
+    """Return the (dotted) name of a graph node.
+
+    The nodes of the components graph (as well as the element names derived
+    from them) are paths, i.e. tuples of names, and those of the failures
+    graph are (type, name) tuples. Their dotted names are only needed for
+    output.
+    """
+    return '.'.join(str(x) for x in node)
 
 
 def check_templates(row_container):
@@ -73,18 +96,48 @@ def check_templates(row_container):
 
 
 class IRContainer(object):
-    """Class modelling the in-memory structures container."""
+    """Class modelling the in-memory structures container.
+
+    By default, the components graph is built as soon as the model is
+    loaded, by expanding every use of a template component into a copy of
+    its components (see the unfold module). With lazy templates, the
+    components graph is kept as the raw input graph (a DAG, where each
+    template component is found once) and the copies are made on demand,
+    while iterating over the components (see iter_components). The expanded
+    components graph is then only built if requested (see component_graph).
+
+    The components graph nodes are paths (see the unfold module), rooted at
+    ROOT, and the failures graph nodes are (type, name) tuples. The names are
+    interned, thus shared by all the nodes and elements that refer to them.
+
+    With compact graphs, the components graph is kept as a CompactGraph
+    (see the compact module), with the nodes (paths) and the objects of the
+    components in the 'node' and 'obj' columns, instead of a networkx graph.
+    """
+
+    def __init__(self, lazy_templates=False, compact_graphs=False):
+        """Initialize IRContainer.
 
-    def __init__(self):
-        """Initialize IRContainer."""
+        Args:
+            lazy_templates (bool): Whether to expand the template components
+                on demand, instead of when loading the model.
+            compact_graphs (bool): Whether to keep the components graph as a
+                CompactGraph, instead of a networkx graph.
+        """
         self._loaded = False
+        self._lazy_templates = lazy_templates
+        self._compact_graphs = compact_graphs
+        self._numbered = False  # Whether the components are numbered
         # Initialize components and failures index
         self._components_index = OrderedDict()  # (name, parent) -> element
         self._failures_index = OrderedDict()  # name -> element
+        # Secondary components index, maintained along the components index
+        self._component_keys = {}  # name -> [(name, parent)]
         # Declare graph structures
         self._raw_input_graph = None
         self._components_graph = None
         self._failures_graph = None
+        self._failures_subgraphs = None  # root component name -> subgraph
         self._failure_models = None
         # Whether the model uses template components
         self._uses_templates = False
@@ -107,30 +160,49 @@ class IRContainer(object):
         # Fill index by creating and associating the appropriate objects
         for row in row_container.component_list:
             # -- create a SystemElement object for row
+            # -- (names are interned, as they make up the graph nodes)
             element = SystemElement(
-                type=row.type,
-                name=row.name,
-                parent=row.parent,
+                type=_intern(row.type),
+                name=_intern(row.name),
+                parent=_intern(row.parent),
                 code=row.code,
                 instances=row.instances)
             # -- if row represents a component, add it to components index
             if is_component(row) and not is_template_def(row):
-                self._components_index[(row.name, row.parent)] = element
+                key = (row.name, row.parent)
+                if key not in self._components_index:
+                    self._component_keys.setdefault(row.name, []).append(key)
+                self._components_index[key] = element
             # -- otherwise, add it to failures index
             elif is_failure(row):
                 self._failures_index[row.name] = element
         # Assign logic to index objects
+        unknown = []  # Logic entries referring to unknown failures
         for row in row_container.logic_list:
             logic = ElementLogic(row.logic)  # Create a logic object
             if row.type.lower() == 'inherited':
                 # -- logic entry refers to component
-                for name, parent in self._components_index:
-                    # -- assign logic to all objects with name == row.component
-                    if name == row.component:
-                        self._components_index[(name, parent)].logic = logic
+                # -- assign logic to all objects with name == row.component
+                keys = self._component_keys.get(row.component)
+                if keys is None:
+                    _logger.warning('Logic defined for unused component "%s"',
+                                    row.component)
+                    continue
+                for key in keys:
+                    self._components_index[key].logic = logic
             else:
                 # -- logic entry refers to failure
-                self._failures_index[row.component].logic = logic
+                element = self._failures_index.get(row.component)
+                if element is None:
+                    unknown.append(row.component)
+                    continue
+                element.logic = logic
+        # Report all invalid logic entries at once
+        for name in unknown:
+            _logger.error('Logic defined for unknown failure "%s"', name)
+        if unknown:
+            raise TranslatorError(
+                "Error while assigning logic. Check log for details.")
 
     def _build_graphs(self, row_container):
         """Build all necessary graphs.
@@ -141,11 +213,14 @@ class IRContainer(object):
         # Build raw input components graph
         self._build_raw_input_component_graph(row_container)
         # Build components graph from raw input components graph
-        self._build_components_graph()
+        if not self._lazy_templates:
+            self._build_components_graph()
         # Build failures graph
         self._build_failures_graph()
         # Assign objects to graph nodes
         self._assign_objects()
+        # Index the failures graph connected components
+        self._build_failures_subgraphs_index()
 
     def _build_raw_input_component_graph(self, row_container):
         """Build the raw input component graph.
@@ -161,7 +236,7 @@ class IRContainer(object):
         rig = self._raw_input_graph
         # -- Form the graph by adding edges, nodes will be added automatically
         [
-            rig.add_edge(row.parent, row.name)
+            rig.add_edge(_intern(row.parent), _intern(row.name))
             for row in row_container.component_list
             if is_component(row) and not is_template_def(row)
         ]
@@ -174,105 +249,55 @@ class IRContainer(object):
         """Build the components graph.
 
         Given the raw input components graph (found in self),
-        build the components graph.
+        build the components graph, by unfolding the template components
+        (see the unfold module).
 
         This method has to be called after _build_raw_input_component_graph.
         This method is not meant to be called from outside the class.
         """
-        def relabel(old_label, node):
-            """Relabel old_label with respect to node.
-
-            Relabel old_label to include the base name of node as the last
-            token of its prefix.
-
-            The label and node tokens are considered to be separated by dots.
-
-            The node base name is its last token.
-
-            If label contains n tokens, the prefix is considered to be the
-            first n-1 tokens. Thus, s is appended to the prefix and the new
-            label contains n+1 tokens.
-            """
-            node_tokens = node.split('.')
-            tokens = old_label.split('.')
-            tokens.insert(-1, str(node_tokens[-1]))
-            return '.'.join(tokens)
-
-        # -- copy the raw input graph to g
-        g = self._raw_input_graph.copy()
-        changed = True
-        # -- Fixed-Point algorithm:
-        # -- Iterate until g does not change
-        while changed:
-            changed = False
-            for u, v in nx.bfs_edges(g, 'ROOT'):
-                if g.in_degree(v) > 1:
-                    # Find the predecessors of the current node
-                    predecessors = [
-                        x for x in nx.all_neighbors(g, v)
-                        if (x, v) in g.edges()
-                    ]
-                    # Disconnect predecessors from v
-                    g.remove_edges_from((x, v) for x in predecessors)
-                    # Clone the sub-graph which has v as its root
-                    sub_graph = g.subgraph(
-                        nbunch=[v] + list(nx.dfs_preorder_nodes(g, v)))
-                    # Remove the sub-graph nodes and edges from the graph
-                    g.remove_nodes_from(sub_graph.nodes_iter())
-                    # For each predecessor, do the following:
-                    for p in predecessors:
-                        # -- obtain a copy of the sub-graph with renamed nodes
-                        # -- by preceding the predecessor name.
-                        rsub = nx.relabel_nodes(sub_graph, {
-                            o: relabel(o, p)
-                            for o in sub_graph.nodes_iter()
-                        })
-                        # -- add and connect the relabeled sub-graph (rsub)
-                        # -- to the current predecessor (p)
-                        g.add_edge(p, relabel(v, p))
-                        g.add_edges_from(rsub.edges_iter())
-                    changed = True
-                    break
+        g = unfold(self._raw_input_graph, 'ROOT',
+                   compact=self._compact_graphs)
         # save g as components graph
         g.graph['filename'] = COMPONENT_GRAPH_FILENAME
         self._components_graph = g
 
     def _build_failures_graph(self):
         """Build the failures graph."""
-        def filter_parent(x):
-            (name, parent), elem = x
-            return name == element.parent
+        # Validate the parent references of all failures at once:
+        # -- the parent of a FailureNode is a component
+        # -- the parent of a FailureEvent is a failure
+        def parent_names(ftype):
+            return set(element.parent
+                       for element in self._failures_index.values()
+                       if element.type.lower() == ftype)
+
+        invalid = {
+            'failurenode': parent_names('failurenode') - set(
+                self._component_keys),
+            'failureevent': parent_names('failureevent') - set(
+                self._failures_index),
+        }
+        if any(invalid.values()):
+            for fname, element in self._failures_index.items():
+                ftype = element.type.lower()
+                if element.parent in invalid[ftype]:
+                    # Parent not found in the appropriate index
+                    _logger.error('Invalid parent name for %s "%s"',
+                                  FAILURE_TYPES[ftype], fname)
+            raise TranslatorError(
+                "Error while building Failures graph. "
+                "Check log for details.")
 
         f = nx.DiGraph(filename=FAILURES_GRAPH_FILENAME, **IR_GRAPH_ATTRIBUTES)
         # Construct the graph
         for fname, element in self._failures_index.items():
-            ftype = element.type
-            parent_id = element.parent
-            if ftype.lower() == 'failurenode':
-                # Look for parent in components index
-                try:
-                    _, elem = next(
-                        filter(filter_parent, self._components_index.items()))
-                    parent_type = elem.type
-                except StopIteration:
-                    # Parent not found in component index, as it should
-                    _logger.error('Invalid parent name for FailureNode "%s"',
-                                  fname)
-                    raise TranslatorError(
-                        "Error while building Failures graph. "
-                        "Check log for details.")
-            elif ftype.lower() == 'failureevent':
-                # Look for parent in failures index
-                if parent_id not in self._failures_index:
-                    # Parent not found in failures index, as it should
-                    _logger.error('Invalid parent name for FailureEvent "%s"',
-                                  fname)
-                    raise TranslatorError(
-                        "Error while building Failures graph. "
-                        "Check log for details.")
-                parent_type = self._failures_index[parent_id].type
-            parent_id = '{}_{}'.format(parent_type, parent_id)
-            f.add_edge(parent_id, element.id)
+            if element.type.lower() == 'failurenode':
+                # Parent is (the first) component with the parent name
+                key = self._component_keys[element.parent][0]
+                parent = self._components_index[key]
+            else:
+                parent = self._failures_index[element.parent]
+            f.add_edge(parent.id, element.id)
         # Save g as failures graph
         self._failures_graph = f
 
@@ -284,19 +309,9 @@ class IRContainer(object):
 
         These objects are then used by the exporter.
         """
-        # Assign objects to components graph
-        g = self._components_graph
-        # -- assign object for ROOT node
-        ro = SystemElement('Compound', 'ROOT', None, 'ROOT', 1)
-        ro.logic = ElementLogic('ROOT')
-        g.node['ROOT']['obj'] = ro
-        # -- assign objects for the rest of nodes
-        for u, v in nx.bfs_edges(g, 'ROOT'):
-            ub = component_basename(u)
-            vb = component_basename(v)
-            obj = copy(self._components_index[(vb, ub)])
-            obj.name = v  # Replace base name with fully qualified name
-            g.node[v]['obj'] = obj
+        # Assign objects to components graph (unless not built yet)
+        if self._components_graph is not None:
+            self._assign_component_objects()
         # Assign objects to failures graph
         f = self._failures_graph
         # Failures graph is not a connected graph, but rather it has a
@@ -305,8 +320,135 @@ class IRContainer(object):
         for n in filter(lambda x: f.in_degree(x) == 0, f.nodes_iter()):
             # -- root is a system component, no need to assign an object
             for u, v in nx.bfs_edges(f, n):
-                _, idx_key = v.split('_')
-                f.node[v]['obj'] = self._failures_index[idx_key]
+                f.node[v]['obj'] = self._failures_index[v[1]]
+
+    def _assign_component_objects(self):
+        """Assign objects to the components graph nodes."""
+        g = self._components_graph
+        if isinstance(g, CompactGraph):
+            nodes, objects = g.column('node'), g.add_column('obj')
+            root = g.find('node', ROOT)
+            objects[root] = self._root_object()
+            for u, v in g.bfs_edges(root):
+                objects[v] = self._component_object(nodes[v], nodes[v][-1],
+                                                    nodes[u][-1])
+            return
+        # -- assign object for ROOT node
+        g.node[ROOT]['obj'] = self._root_object()
+        # -- assign objects for the rest of nodes
+        for u, v in nx.bfs_edges(g, ROOT):
+            g.node[v]['obj'] = self._component_object(v, v[-1], u[-1])
+
+    @staticmethod
+    def _root_object():
+        """Return the object of the ROOT node of the components graph."""
+        ro = SystemElement('Compound', ROOT, None, 'ROOT', 1)
+        ro.logic = ElementLogic('ROOT')
+        return ro
+
+    def _component_object(self, node, name, parent):
+        """Return the object of a components graph node.
+
+        The object is a copy of the element of the component (name, parent),
+        named after the node (its path).
+        """
+        obj = copy(self._components_index[(name, parent)])
+        obj.name = node  # Replace base name with path
+        return obj
+
+    def number_components(self):
+        """Replace the component names with unique integers (IDs).
+
+        The components are numbered in the order of the nodes of the
+        components graph, starting from 1, and their base names are stored
+        as their descriptions. The ROOT component keeps its name. Numbered
+        components are named (and keyed) by 1-tuples, e.g. (1,), so that
+        every name remains a path.
+        """
+        self._numbered = True
+        g = self._components_graph
+        if g is None:
+            return  # Numbered while iterating (see iter_components)
+        if isinstance(g, CompactGraph):
+            # The nodes are already numbered, by their ids
+            nodes, objects = g.column('node'), g.column('obj')
+            root = g.find('node', ROOT)
+            for n in g:
+                if n != root:
+                    nodes[n] = (n + 1,)
+            for u, v in g.bfs_edges(root):
+                objects[v].description = objects[v].name[-1]
+                objects[v].name = nodes[v]
+            return
+        # Create relabeling mapping.
+        # Each component name will be replaced with a number (ID).
+        relabel_mapping = {n: (c,) for n, c in zip(g.nodes_iter(), count(1))}
+        del relabel_mapping[ROOT]  # We don't want to relabel ROOT
+        # Relabel and rename components graph
+        # -- relabel a copy, as relabeling in-place does not keep the order
+        # -- of the children of each node
+        g = self._components_graph = nx.relabel_nodes(g, relabel_mapping)
+        for u, v in nx.bfs_edges(g, ROOT):
+            # -- get a hold of the associated object
+            vo = g.node[v]['obj']
+            # -- set base name as description
+            vo.description = vo.name[-1]
+            # -- set ID number as name
+            vo.name = v
+
+    def iter_components(self):
+        """Iterate over the components, in breadth-first order from ROOT.
+
+        Yield a (node, object, children) tuple per component, where node is
+        its components graph node, object its SystemElement and children the
+        list of the nodes of its children.
+
+        With lazy templates, the template components are expanded as they
+        are reached, thus the components graph is not built; each object is
+        created when its parent is yielded, to be yielded in turn.
+        """
+        g = self._components_graph
+        if isinstance(g, CompactGraph):
+            nodes, objects = g.column('node'), g.column('obj')
+            for n in g.bfs(g.find('node', ROOT)):
+                yield (nodes[n], objects[n],
+                       [nodes[c] for c in g.successors(n)])
+            return
+        if g is not None:
+            for n in chain([ROOT], (v for _, v in nx.bfs_edges(g, ROOT))):
+                yield n, g.node[n]['obj'], g.successors(n)
+            return
+        objects = {}  # node -> object, until yielded
+        for node, origin, _, children in walk(self._raw_input_graph, 'ROOT'):
+            obj = objects.pop(node) if node != ROOT else self._root_object()
+            child_nodes = []
+            for child, child_origin, child_index in children:
+                child_obj = self._component_object(child, child_origin,
+                                                   origin)
+                if self._numbered:
+                    child_obj.description = child[-1]
+                    child_obj.name = (child_index + 1,)
+                objects[child] = child_obj
+                child_nodes.append(child_obj.name)
+            yield obj.name, obj, child_nodes
+
+    def _build_failures_subgraphs_index(self):
+        """Build the failures sub-graphs index.
+
+        The failures graph has a connected component for the failures of
+        each system component, rooted at the node of that component.
+        Index each connected component by the name of its root component.
+
+        The sub-graphs share the node and edge attributes with the failures
+        graph, thus they must be treated as read-only.
+        """
+        f = self._failures_graph
+        self._failures_subgraphs = {}
+        for nodes in nx.weakly_connected_components(f):
+            cc = f.subgraph(nodes)
+            root = next(filter(lambda x: cc.in_degree(x) == 0,
+                               cc.nodes_iter()))
+            self._failures_subgraphs[root[1]] = cc
 
     def _load_failure_models(self, row_container):
         _logger.info('Loading failure models')
@@ -332,9 +474,11 @@ class IRContainer(object):
             os.makedirs(output_dir, mode=0o755)
         # Export graphs to image files
         glist = [
-            self._raw_input_graph, self._components_graph, self._failures_graph
+            self._raw_input_graph, self.component_graph, self._failures_graph
         ]
         for g in filter(lambda x: x is not None, glist):  # Only non-None
+            if g is not self._raw_input_graph:  # -- label nodes by name
+                g = nx.relabel_nodes(g, {n: dotted(n) for n in g})
             pdg = nx.drawing.nx_pydot.to_pydot(g)
             pdg.write_png(os.path.join(output_dir, g.graph['filename']))
 
@@ -345,7 +489,21 @@ class IRContainer(object):
 
     @property
     def component_graph(self):
-        """nx.DiGraph: the components graph."""
+        """nx.DiGraph: the components graph.
+
+        With lazy templates, the components graph is built (expanded) on the
+        first access. With compact graphs, a networkx copy of the components
+        graph is returned (e.g. for export or debugging), sharing the objects
+        of the components.
+        """
+        if self._components_graph is None and self._loaded:
+            _logger.info('Expanding template components')
+            self._build_components_graph()
+            self._assign_component_objects()
+            if self._numbered:
+                self.number_components()
+        if isinstance(self._components_graph, CompactGraph):
+            return self._components_graph.to_networkx('node')
         return self._components_graph
 
     @property
@@ -353,11 +511,28 @@ class IRContainer(object):
         """nx.DiGraph: the failures graph."""
         return self._failures_graph
 
+    def failures_subgraph(self, component_name):
+        """Return the failures sub-graph of the given component.
+
+        Return None if no failures are defined for the component.
+        """
+        return self._failures_subgraphs.get(component_name)
+
     @property
     def failure_models(self):
         """list: the failure models defined in the input model."""
         return self._failure_models
 
+    @property
+    def compact_graphs(self):
+        """boolean: whether the components graph is a CompactGraph."""
+        return self._compact_graphs
+
+    @property
+    def lazy_templates(self):
+        """boolean: whether template components are expanded on demand."""
+        return self._lazy_templates
+
     @property
     def uses_templates(self):
         """boolean: whether the model uses template components."""
@@ -4,9 +4,11 @@ Each row is modelled as a class, in order to allow easier manipulation,
 if such functionality is required later on.
 
 For the time being, row modelling classes act only as value containers.
+They use __slots__ (one slot per column of the loader SCHEMAS, assigned by
+__init__), since models may contain hundreds of thousands of rows.
 """
 import logging
-from amtt.loader import InputSheet, SCHEMAS
+from amtt.loader import InputSheet
 
 _logger = logging.getLogger(__name__)
 
@@ -14,28 +16,41 @@ _logger = logging.getLogger(__name__)
 class ComponentRow(object):
     """Class modelling a system Component, as read from the input (flat)."""
 
+    __slots__ = ('code', 'instances', 'logic', 'name', 'parent', 'type')
+
     def __init__(self, **kwargs):
         """Initialize ComponentRow."""
-        for arg in SCHEMAS[InputSheet.components]:
-            setattr(self, arg, kwargs[arg])
+        self.code = kwargs['code']
+        self.instances = kwargs['instances']
+        self.logic = kwargs['logic']
+        self.name = kwargs['name']
+        self.parent = kwargs['parent']
+        self.type = kwargs['type']
 
 
 class LogicRow(object):
     """Class modelling a Logic entry, as read from the input (flat)."""
 
+    __slots__ = ('component', 'logic', 'type')
+
     def __init__(self, **kwargs):
         """Initialize LogicRow."""
-        for arg in SCHEMAS[InputSheet.logic]:
-            setattr(self, arg, kwargs[arg])
+        self.component = kwargs['component']
+        self.logic = kwargs['logic']
+        self.type = kwargs['type']
 
 
 class FailureModelRow(object):
     """Class modelling a FailureModel entry, as read from the input (flat)."""
 
+    __slots__ = ('distribution', 'name', 'parameters', 'standbystate')
+
     def __init__(self, **kwargs):
         """Initialize FailureModelRow."""
-        for arg in SCHEMAS[InputSheet.failure_models]:
-            setattr(self, arg, kwargs[arg])
+        self.distribution = kwargs['distribution']
+        self.name = kwargs['name']
+        self.parameters = kwargs['parameters']
+        self.standbystate = kwargs['standbystate']
 
 
 class RowsContainer(object):
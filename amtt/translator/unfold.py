@@ -0,0 +1,320 @@
+"""Unfolding of the raw input components graph into the components graph.
+
+The raw input graph is a DAG: a template component has a single node, with
+an edge from each of the components that use it. The components graph is
+the tree obtained by unfolding the DAG, i.e. by giving each shared node (a
+node with more than one parent) a separate copy of itself and of its
+sub-graph under each of its parents.
+
+The nodes of the components graph are paths, i.e. tuples of graph nodes
+(names): a node that is not copied is keyed by (node,), while the copies are
+keyed by the base names of the parents they are copied under, followed by
+the copied node (see qualify). For example, Part of a Magnet template, when
+used by Circuit1, becomes ('Circuit1', 'Part'), while Part of a Coil
+template, used by the Pole1 and Pole2 components of Magnet, becomes
+('Circuit1', 'Pole1', 'Part') and ('Circuit1', 'Pole2', 'Part'). The path
+segments are the graph nodes themselves, thus they are shared by all paths.
+
+The sub-graph of each shared node is traversed only once, into a template
+(see _Template), which is then stamped out under each parent. The shared
+nodes are unfolded in breadth-first order from the root, one level of
+nesting at a time, so that the nodes and the children of each node are
+ordered as if the shared nodes were unfolded one by one (as in the
+components graph of previous versions).
+"""
+
+from collections import deque
+from copy import deepcopy
+
+import networkx as nx
+
+from .compact import CompactGraph
+
+
+def qualify(name, tokens):
+    """Return the path of the copy of a graph node, qualified by tokens.
+
+    The tokens (the base names of the parents the node is copied under,
+    outermost first) precede the node itself.
+    """
+    return tokens + (name,)
+
+
+def preorder(graph, source, stop=()):
+    """Return the nodes reachable from source, in depth-first pre-order.
+
+    The nodes in stop are not visited, nor is anything below them (unless
+    reachable through other nodes).
+    """
+    nodes = [source]
+    visited = {source}
+    stack = [iter(graph.succ[source])]
+    while stack:
+        for child in stack[-1]:
+            if child not in visited and child not in stop:
+                visited.add(child)
+                nodes.append(child)
+                stack.append(iter(graph.succ[child]))
+                break
+        else:
+            stack.pop()
+    return nodes
+
+
+class _Template(object):
+    """The sub-graph of a shared node, as copied under each of its parents.
+
+    Holds the nodes reachable from the shared node without passing through
+    another shared node, in the order they are copied, along with their
+    children. The shared nodes found below them (i.e. nested templates) are
+    not part of the template: they are only referenced, along with their
+    parents in the template, to be unfolded in turn.
+    """
+
+    __slots__ = ('order', 'children', 'nested')
+
+    def __init__(self, graph, root, shared=frozenset()):
+        """Initialize _Template.
+
+        Args:
+            graph (nx.DiGraph): The raw input graph.
+            root (str): The shared node.
+            shared (set): The shared nodes of graph, i.e. the nodes where the
+                template ends. If empty, the template holds the whole
+                sub-graph of root.
+        """
+        nodes = preorder(graph, root, stop=shared)
+        # The nodes are copied in the order they are reached by their edges,
+        # taking the sources in that order as well (the order of the nodes
+        # of a copied sub-graph, twice over, in previous versions).
+        for _ in range(2):
+            nodes = _edge_order(graph, nodes)
+            nodes = nodes[:1] + [n for n in nodes[1:] if n not in shared]
+        self.order = nodes
+        self.children = {n: list(graph.succ[n]) for n in self.order}
+        self.nested = {}  # nested shared node -> parents
+        for node in self.order:
+            for child in self.children[node]:
+                if child in shared:
+                    self.nested.setdefault(child, []).append(node)
+
+
+def _edge_order(graph, sources):
+    """Return the nodes reached by the edges of sources, in edge order.
+
+    The first source (the root) comes first, even if it has no edges.
+    """
+    nodes = [sources[0]]
+    seen = {sources[0]}
+    for u in sources:
+        for v in graph.succ[u]:
+            if u not in seen:
+                seen.add(u)
+                nodes.append(u)
+            if v not in seen:
+                seen.add(v)
+                nodes.append(v)
+    return nodes
+
+
+class _Pending(object):
+    """A copy of a shared node, pending to be unfolded.
+
+    Takes the place of the copy in the children of its parents, until it is
+    replaced by a copy per parent.
+    """
+
+    __slots__ = ('node', 'tokens', 'parents')
+
+    def __init__(self, node, tokens, parents):
+        self.node = node  # the shared node
+        self.tokens = tokens  # the tokens qualifying the copy (see qualify)
+        self.parents = parents
+
+    @property
+    def label(self):
+        """tuple: the path of the copy."""
+        return qualify(self.node, self.tokens)
+
+
+class _Unfolder(object):
+    """Unfolds a DAG into a tree (see unfold)."""
+
+    def __init__(self, graph, root):
+        self._graph = graph
+        self._root = root
+        self._shared = set(n for n in graph.nodes_iter()
+                           if graph.in_degree(n) > 1)
+        self._unreachable = set()  # tree nodes not reachable from root
+        self._templates = {}  # (shared node, whole) -> _Template
+        self._nodes = {}  # tree node (path) -> (graph node, index)
+        self._children = {}  # tree node -> children
+        # _Pending objects not unfolded yet (a dict, used as an ordered set)
+        self._pending = {}
+        self._count = 0  # number of tree nodes added so far
+
+    def unfold(self, compact=False):
+        """Unfold the graph and return the tree (see unfold)."""
+        for _ in self.walk():
+            pass
+        # Shared nodes pending under unreachable parents only are kept
+        for pending in list(self._pending):
+            self._copy_unreachable(pending)
+        if compact:
+            # The tree nodes are numbered by index, i.e. in insertion order
+            nodes = self._nodes
+            tree = CompactGraph(
+                ([nodes[c][1] for c in self._children[n]] for n in nodes),
+                {'node': list(nodes)})
+        else:
+            tree = nx.DiGraph()
+            tree.add_nodes_from(self._nodes)
+            tree.add_edges_from((n, c) for n in self._nodes
+                                for c in self._children[n])
+        tree.graph = deepcopy(self._graph.graph)
+        return tree
+
+    def walk(self, release=False):
+        """Unfold the graph, walking the tree in breadth-first order.
+
+        Yield a (node, origin, index, children) tuple per tree node reachable
+        from the root, once its children are known, where:
+            - origin is the graph node that node is a copy of.
+            - index is the position of node in the nodes of the tree.
+            - children is a list of (child, origin, index) tuples.
+
+        If release, the tree nodes are forgotten once yielded, thus the tree
+        is never held in memory as a whole (and cannot be returned).
+        """
+        self._copy_outer_nodes()
+        queue = deque([(self._root,)])
+        while queue:
+            node = queue.popleft()
+            children = self._children[node]
+            i = 0
+            while i < len(children):
+                child = children[i]
+                if type(child) is _Pending:
+                    # Replaces child (in children) with its copies
+                    self._stamp(child)
+                    continue
+                queue.append(child)
+                i += 1
+            origin, index = self._nodes[node]
+            yield (node, origin, index,
+                   [(c,) + self._nodes[c] for c in children])
+            if release:
+                del self._nodes[node]
+                del self._children[node]
+
+    def _add(self, node, origin, children):
+        """Add a node to the tree."""
+        self._nodes[node] = (origin, self._count)
+        self._children[node] = children
+        self._count += 1
+
+    def _copy_outer_nodes(self):
+        """Copy the nodes that do not need to be unfolded.
+
+        These are the nodes that are neither shared nor below a shared node,
+        as well as the ones that are not reachable from the root.
+        The (reachable) shared nodes are left pending, to be unfolded.
+        """
+        g = self._graph
+        reachable = nx.descendants(g, self._root)
+        self._unreachable = set(
+            (n,) for n in g.nodes_iter()
+            if n not in reachable and n != self._root)
+        inner = set()
+        for n in nx.topological_sort(g):
+            if (n in self._shared and n in reachable or
+                    any(p in inner for p in g.predecessors_iter(n))):
+                inner.add(n)
+        pending = {}
+        for n in g.nodes_iter():
+            if n in self._shared and n in inner:
+                parents = [(p,) for p in g.predecessors_iter(n)
+                           if p not in inner]
+                if parents:
+                    pending[n] = _Pending(n, (), parents)
+                    self._pending[pending[n]] = None
+        for n in g.nodes_iter():
+            if n not in inner:
+                self._add((n,), n, [pending.get(c, (c,))
+                                    for c in g.successors_iter(n)])
+
+    def _template(self, node, whole=False):
+        """Return the template of the given shared node.
+
+        If whole, the template holds the whole sub-graph of the node,
+        without unfolding the nested shared nodes.
+        """
+        try:
+            return self._templates[(node, whole)]
+        except KeyError:
+            template = _Template(self._graph, node,
+                                 frozenset() if whole else self._shared)
+            self._templates[(node, whole)] = template
+            return template
+
+    def _stamp(self, pending):
+        """Unfold a pending copy, stamping out the template per parent."""
+        for parent in pending.parents:
+            # Copies under unreachable parents are not unfolded further
+            template = self._template(pending.node,
+                                      whole=parent in self._unreachable)
+            siblings = self._children[parent]
+            siblings.remove(pending)
+            tokens = pending.tokens + (parent[-1],)
+            labels = {n: qualify(n, tokens) for n in template.order}
+            for n, nested_parents in template.nested.items():
+                labels[n] = _Pending(n, tokens,
+                                     [labels[p] for p in nested_parents])
+                self._pending[labels[n]] = None
+            for n in template.order:
+                self._add(labels[n], n,
+                          [labels[c] for c in template.children[n]])
+            siblings.append(labels[pending.node])
+        pending.parents = None  # Done
+        del self._pending[pending]
+
+    def _copy_unreachable(self, pending):
+        """Copy a pending shared node and its sub-graph, as they are."""
+        for parent in pending.parents:
+            siblings = self._children[parent]
+            siblings[siblings.index(pending)] = (pending.node,)
+        pending.parents = None
+        del self._pending[pending]
+        template = self._template(pending.node, whole=True)
+        for n in template.order:
+            if (n,) not in self._children:
+                self._add((n,), n, [(c,) for c in template.children[n]])
+
+
+def unfold(graph, root='ROOT', compact=False):
+    """Unfold the raw input graph into the components graph.
+
+    Args:
+        graph (nx.DiGraph): The raw input graph (a DAG).
+        root (str): The root node of graph.
+        compact (bool): Whether to return a CompactGraph, whose nodes are
+            numbered in the order of the nodes of the nx.DiGraph, with the
+            latter in the 'node' column.
+
+    Returns:
+        nx.DiGraph or CompactGraph: the components graph (a tree, rooted at
+            (root,), plus any nodes not reachable from root), with the graph
+            attributes of graph.
+    """
+    return _Unfolder(graph, root).unfold(compact)
+
+
+def walk(graph, root='ROOT'):
+    """Unfold the raw input graph lazily.
+
+    Return an iterator over the nodes of the components graph (reachable
+    from root), in breadth-first order, which unfolds the shared nodes as it
+    reaches them (see _Unfolder.walk for the items). The nodes are not kept
+    once consumed, thus the components graph is never held in memory.
+    """
+    return _Unfolder(graph, root).walk(release=True)
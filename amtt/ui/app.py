@@ -8,7 +8,7 @@ from tkinter import *
 from tkinter import filedialog, messagebox
 from tkinter.ttk import *
 
-from amtt.loader import csv, excel
+from amtt.loader import lazy_handler
 from amtt import version
 from amtt.main import execute
 
@@ -195,10 +195,10 @@ class Application(Frame):
         args = Namespace()
         if input_type.lower() == 'excel':
             args.excel_in = input_path
-            args.func = excel.handler
+            args.func = lazy_handler('excel')
         elif input_type.lower() == 'csv':
             args.dir_in = input_path
-            args.func = csv.handler
+            args.func = lazy_handler('csv')
         else:
             raise ValueError("Unknown input type: {}".format(input_type))
         args.target = target
@@ -0,0 +1,90 @@
+"""Benchmark for the compound sub-graph extraction of the RBD exporter.
+
+Builds synthetic component hierarchies of increasing size and measures the
+time needed to extract the sub-graph of every compound node, as done by
+Rbd._construct_compound_blocks, i.e. by compound_subgraphs over the
+components of the IR container. Two shapes are measured:
+    - deep: a chain of nested compounds, each one with a few basic children.
+    - wide: one compound with many compound children, each one with a few
+      basic children.
+
+The extraction is expected to scale linearly, i.e. the time per component
+should remain (roughly) constant as the hierarchy grows.
+
+Run with:
+    python benchmarks/bench_compound_extraction.py
+"""
+import argparse
+import time
+
+from amtt.exporter.isograph.rbd import compound_subgraphs
+from amtt.loader import InputSheet
+from amtt.translator.ir import IRContainer
+from amtt.translator.rows import RowsContainer
+
+BASICS_PER_COMPOUND = 4
+
+
+def add_component(rc, type, name, parent):
+    """Add a component row to rc."""
+    rc.add_row(InputSheet.components, type=type, name=name, parent=parent,
+               code=name, instances=1, logic=None)
+
+
+def add_basics(rc, compound):
+    for i in range(BASICS_PER_COMPOUND):
+        add_component(rc, 'Basic', '{}.B{}'.format(compound, i), compound)
+
+
+def deep_hierarchy(compounds):
+    """Return the rows of a chain of nested compounds."""
+    rc = RowsContainer()
+    parent = 'ROOT'
+    for i in range(compounds):
+        name = 'C{}'.format(i)
+        add_component(rc, 'Compound', name, parent)
+        add_basics(rc, name)
+        parent = name
+    return rc
+
+
+def wide_hierarchy(compounds):
+    """Return the rows of one compound with compounds - 1 compound children."""
+    rc = RowsContainer()
+    add_component(rc, 'Compound', 'C0', 'ROOT')
+    add_basics(rc, 'C0')
+    for i in range(1, compounds):
+        name = 'C{}'.format(i)
+        add_component(rc, 'Compound', name, 'C0')
+        add_basics(rc, name)
+    return rc
+
+
+def extract_all(ir):
+    """Extract the sub-graph of every compound component of ir."""
+    for _ in compound_subgraphs(ir.iter_components()):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[250, 500, 1000, 2000, 4000],
+                        help='Numbers of compounds to benchmark with')
+    args = parser.parse_args()
+    print('{:>6} {:>10} {:>10} {:>14}'.format(
+        'shape', 'compounds', 'time (s)', 'us/component'))
+    for shape, build in (('deep', deep_hierarchy), ('wide', wide_hierarchy)):
+        for size in args.sizes:
+            ir = IRContainer()
+            ir.load_from_rows(build(size))
+            components = ir.component_graph.number_of_nodes()
+            start = time.perf_counter()
+            extract_all(ir)
+            elapsed = time.perf_counter() - start
+            print('{:>6} {:>10} {:>10.3f} {:>14.2f}'.format(
+                shape, size, elapsed, elapsed / components * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Import time benchmark for the amtt and amtt-gui entry points.
+
+Measures the time needed to import the modules of the entry points, as
+reported by python -X importtime (best of several runs, each one in a fresh
+interpreter), and checks that:
+    - the import time is within the given budget.
+    - none of the heavy third-party packages (needed only by the translation
+      stages) gets imported.
+
+Exits with a non-zero status if any check fails (including an entry point
+that fails to import), so that it can be used to catch startup regressions.
+An entry point is skipped only if a package it requires (i.e. tkinter, for
+amtt-gui) is not available.
+
+Run with:
+    python benchmarks/bench_import_time.py
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+# (entry point, module imported at startup, required package or None)
+ENTRY_POINTS = [
+    ('amtt', 'amtt.main', None),
+    ('amtt-gui', 'amtt.ui.app', 'tkinter'),
+]
+
+# Packages that must not be imported at startup
+HEAVY_PACKAGES = [
+    'networkx',
+    'lxml',
+    'openpyxl',
+    'pydotplus',
+    'pyexcel',
+    'pyexcel_xls',
+    'sliding_window',
+    'sqlite3',
+]
+
+# Default import time budget per entry point, in milliseconds
+DEFAULT_BUDGET = 100
+
+IMPORTTIME_LINE = re.compile(r'import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)')
+
+
+class ImportFailed(Exception):
+    """Raised when a module fails to import."""
+
+
+def importable(module):
+    """Return whether module can be imported (in a fresh interpreter)."""
+    result = subprocess.run([sys.executable, '-c', 'import ' + module],
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def import_time(module):
+    """Return the cumulative import time of module (in ms).
+
+    Raise ImportFailed if module cannot be imported.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    lines = result.stderr.splitlines()
+    if result.returncode != 0:
+        errors = [x for x in lines if not x.startswith('import time:')]
+        raise ImportFailed(errors[-1] if errors else
+                           'exit status {}'.format(result.returncode))
+    for line in lines:
+        match = IMPORTTIME_LINE.match(line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise ImportFailed('no import time reported')
+
+
+def heavy_imports(module):
+    """Return the heavy packages imported along with module."""
+    code = ('import sys, {}; print(",".join(sorted(set('
+            'm.split(".")[0] for m in sys.modules))))').format(module)
+    result = subprocess.run([sys.executable, '-c', code],
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    imported = set(result.stdout.strip().split(','))
+    return [p for p in HEAVY_PACKAGES if p in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Import time budget per entry point, in ms '
+                        '(default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Number of runs per entry point '
+                        '(default: %(default)s)')
+    args = parser.parse_args()
+    failed = False
+    print('{:>10} {:>14} {:>12}  {}'.format(
+        'entry', 'module', 'time (ms)', 'heavy imports'))
+    for entry, module, required in ENTRY_POINTS:
+        if required is not None and not importable(required):
+            print('{:>10} {:>14} {:>12}  ({} not available)'.format(
+                entry, module, 'skipped', required))
+            continue
+        try:
+            best = min(import_time(module) for _ in range(args.runs))
+        except ImportFailed as e:
+            print('{:>10} {:>14} {:>12}  {}'.format(entry, module, 'error', e))
+            failed = True
+            continue
+        heavy = heavy_imports(module)
+        print('{:>10} {:>14} {:>12.1f}  {}'.format(
+            entry, module, best, ', '.join(heavy) or '-'))
+        if best > args.budget or heavy:
+            failed = True
+    if failed:
+        print('FAILED: entry point import failed, import time budget ({} ms) '
+              'exceeded or heavy packages imported at startup'.format(
+                  args.budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Memory benchmark for the input rows and the IR of the translator.
+
+Builds synthetic models of increasing size, made of circuits that contain
+instances of a template component, and measures (with tracemalloc):
+    - rows: the memory held by the input rows (RowsContainer), per row.
+    - ir: the memory held by the IR container, per component of the
+      (unfolded) components graph.
+    - peak: the peak memory while loading the IR, per component.
+    - objects: the memory of the row and entity objects alone, per component
+      (i.e. excluding the graphs and indexes that refer to them).
+
+With --lazy-templates, the IR is loaded with lazy templates, i.e. without
+expanding the template components (the components are counted by iterating
+over them), and the entity objects are not taken into account.
+With --compact-graphs, the components graph is kept as a CompactGraph.
+
+Run with:
+    python benchmarks/bench_memory.py
+"""
+import argparse
+import sys
+import tracemalloc
+
+from amtt.loader import InputSheet
+from amtt.translator.ir import IRContainer
+from amtt.translator.rows import RowsContainer
+
+BASICS_PER_TEMPLATE = 8
+
+
+def build_rows(circuits):
+    """Return a RowsContainer with the given number of circuits."""
+    rc = RowsContainer()
+
+    def component(type, name, parent, code, instances=1, logic=None):
+        rc.add_row(InputSheet.components, type=type, name=name,
+                   parent=parent, code=code, instances=instances,
+                   logic=logic)
+
+    def logic(component, logic):
+        rc.add_row(InputSheet.logic, type='inherited', component=component,
+                   logic=logic)
+
+    component('Compound', 'System', 'ROOT', 'SYS')
+    logic('System', 'AND')
+    for i in range(circuits):
+        name = 'Circuit{}'.format(i)
+        component('Compound', name, 'System', 'C{}'.format(i))
+        logic(name, 'AND')
+        component('Compound', 'Magnet', name, 'MAG')
+    component('Compound', 'Magnet', '*', 'MAG')
+    logic('Magnet', 'AND')
+    for j in range(BASICS_PER_TEMPLATE):
+        component('Basic', 'Part{}'.format(j), 'Magnet', 'P{}'.format(j), 1,
+                  'FM1')
+    rc.add_row(InputSheet.failure_models, name='FM1',
+               distribution='exponential', parameters='1000',
+               standbystate=None)
+    return rc
+
+
+def object_size(obj):
+    """Return the size of obj, including its __dict__ (if any)."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def measure(circuits, lazy_templates=False, compact_graphs=False):
+    tracemalloc.start()
+    rc = build_rows(circuits)
+    rows_size, _ = tracemalloc.get_traced_memory()
+    rows = len(rc.component_list) + len(rc.logic_list)
+    # Restart tracing, to measure the peak of the IR loading alone
+    # (tracemalloc.reset_peak requires Python 3.9).
+    tracemalloc.stop()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    ir = IRContainer(lazy_templates=lazy_templates,
+                     compact_graphs=compact_graphs)
+    ir.load_from_rows(rc)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects = sum(object_size(r) for r in rc.component_list)
+    if lazy_templates:
+        components = sum(1 for _ in ir.iter_components())
+    else:
+        g = ir.component_graph
+        components = g.number_of_nodes()
+        objects += sum(object_size(g.node[n]['obj']) for n in g.nodes_iter())
+    return (rows_size / rows, (after - before) / components,
+            (peak - before) / components, objects / components, components)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100, 200, 400, 800],
+                        help='Numbers of circuits to benchmark with')
+    parser.add_argument('--lazy-templates', action='store_true',
+                        help='Load the IR with lazy templates')
+    parser.add_argument('--compact-graphs', action='store_true',
+                        help='Load the IR with compact graphs')
+    args = parser.parse_args()
+    print('{:>9} {:>11} {:>10} {:>10} {:>10} {:>10}'.format(
+        'circuits', 'components', 'rows', 'ir', 'peak', 'objects'))
+    print('{:>9} {:>11} {:>10} {:>10} {:>10} {:>10}'.format(
+        '', '', 'B/row', 'B/comp.', 'B/comp.', 'B/comp.'))
+    for size in args.sizes:
+        rows, ir, peak, objects, components = measure(
+            size, args.lazy_templates, args.compact_graphs)
+        print('{:>9} {:>11} {:>10.0f} {:>10.0f} {:>10.0f} {:>10.0f}'.format(
+            size, components, rows, ir, peak, objects))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark for the unfolding of the raw input graph into a tree.
+
+Builds synthetic raw input graphs of increasing size, made of circuits that
+use a template component, and measures the time needed to unfold them into
+the components graph, as done by IRContainer._build_components_graph.
+Two shapes are measured:
+    - flat: each circuit uses a Magnet template, made of basic parts.
+    - nested: each circuit uses a Magnet template, whose poles use a Coil
+      template, made of basic parts.
+
+The unfolding is expected to scale linearly, i.e. the time per component
+(of the components graph) should remain (roughly) constant as the model
+grows.
+
+Run with:
+    python benchmarks/bench_unfolding.py
+"""
+import argparse
+import time
+
+import networkx as nx
+
+from amtt.translator.unfold import unfold
+
+PARTS_PER_TEMPLATE = 8
+POLES_PER_MAGNET = 4
+
+
+def add_parts(g, template):
+    for i in range(PARTS_PER_TEMPLATE):
+        g.add_edge(template, '{}Part{}'.format(template, i))
+
+
+def raw_graph(circuits, nested):
+    """Return a raw input graph with the given number of circuits."""
+    g = nx.DiGraph()
+    g.add_edge('ROOT', 'System')
+    for i in range(circuits):
+        name = 'Circuit{}'.format(i)
+        g.add_edge('System', name)
+        g.add_edge(name, 'Magnet')
+    add_parts(g, 'Magnet')
+    if nested:
+        for i in range(POLES_PER_MAGNET):
+            name = 'Pole{}'.format(i)
+            g.add_edge('Magnet', name)
+            g.add_edge(name, 'Coil')
+        add_parts(g, 'Coil')
+    return g
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[250, 500, 1000, 2000, 4000],
+                        help='Numbers of circuits to benchmark with')
+    args = parser.parse_args()
+    print('{:>7} {:>9} {:>11} {:>10} {:>14}'.format(
+        'shape', 'circuits', 'components', 'time (s)', 'us/component'))
+    for shape in ('flat', 'nested'):
+        for size in args.sizes:
+            g = raw_graph(size, shape == 'nested')
+            start = time.perf_counter()
+            tree = unfold(g, 'ROOT')
+            elapsed = time.perf_counter() - start
+            components = tree.number_of_nodes()
+            print('{:>7} {:>9} {:>11} {:>10.3f} {:>14.2f}'.format(
+                shape, size, components, elapsed,
+                elapsed / components * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -49,7 +49,12 @@ class BuildStandaloneExeCommand(distutils.cmd.Command):
             '  --add-data amtt/ui/icon64x64.gif{sep}amtt/ui'.format(sep=sep),
             '  --add-data amtt/exporter/isograph/emitter/xml/template-2.1.xml'
             '{sep}amtt/exporter/isograph/emitter/xml'.format(sep=sep),
-            '  --hidden-import pyexcel_xls.xls'
+            # The loaders, exporters and emitters are imported by name
+            # (see LOADERS, EXPORTERS and EMITTERS), thus PyInstaller cannot
+            # find them, nor their third-party dependencies, on its own
+            '  --collect-submodules amtt',
+            '  --hidden-import openpyxl',
+            '  --hidden-import pyexcel_xls.xls',
             '  amtt/main.py',
             '  -i resources/icon.ico',
             '  -n amtt_{plat}-{ver}'.format(plat=sys.platform,
@@ -123,8 +128,8 @@ setup(
         'pydotplus',
         'pyexcel',
         'pyexcel-xls',
+        'openpyxl',
         'sliding-window',
-        'lxml',
     ],
 
     # If there are data files included in your packages that need to be
@@ -0,0 +1,91 @@
+"""Tests of the compact (array-backed) components graph."""
+
+import unittest
+
+import networkx as nx
+
+from amtt.translator.compact import CompactGraph
+from amtt.translator.unfold import unfold
+
+ROOT = ('ROOT',)
+
+
+def raw_input_graph():
+    """Return a raw input graph with nested templates.
+
+    Magnet is used by two circuits and Coil by the two poles of Magnet.
+    Orphan is not reachable from ROOT, yet it uses Coil too.
+    """
+    g = nx.DiGraph(filename='raw.png')
+    g.add_edges_from([
+        ('ROOT', 'System'),
+        ('System', 'Circuit1'), ('System', 'Circuit2'),
+        ('Circuit1', 'Magnet'), ('Circuit2', 'Magnet'),
+        ('Magnet', 'Pole1'), ('Magnet', 'Pole2'), ('Magnet', 'Yoke'),
+        ('Pole1', 'Coil'), ('Pole2', 'Coil'),
+        ('Coil', 'Winding'),
+        ('Orphan', 'Coil'), ('Orphan', 'Extra'),
+    ])
+    return g
+
+
+class CompactGraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = unfold(raw_input_graph(), compact=False)
+        self.compact = unfold(raw_input_graph(), compact=True)
+        self.nodes = self.compact.column('node')
+        self.root = self.compact.find('node', ROOT)
+
+    def labels(self, ids):
+        return [self.nodes[n] for n in ids]
+
+    def edge_labels(self, edges):
+        return [(self.nodes[u], self.nodes[v]) for u, v in edges]
+
+    def test_nodes_and_edges(self):
+        self.assertEqual(self.labels(self.compact), self.tree.nodes())
+        self.assertEqual(self.edge_labels(self.compact.edges()),
+                         self.tree.edges())
+        self.assertEqual(self.compact.graph, self.tree.graph)
+
+    def test_bfs_edges(self):
+        self.assertEqual(
+            self.edge_labels(self.compact.bfs_edges(self.root)),
+            list(nx.bfs_edges(self.tree, ROOT)))
+
+    def test_dfs_edges(self):
+        self.assertEqual(
+            self.edge_labels(self.compact.dfs_edges(self.root)),
+            list(nx.dfs_edges(self.tree, ROOT)))
+
+    def test_topological_sort(self):
+        self.assertEqual(self.labels(self.compact.topological_sort()),
+                         nx.topological_sort(self.tree))
+
+    def test_subgraph(self):
+        # The nodes under Circuit2, in reverse, plus ROOT (not connected)
+        nodes = list(reversed(
+            list(self.compact.dfs_preorder(
+                self.compact.find('node', ('Circuit2',))))))
+        nodes.append(self.root)
+        sub = self.compact.subgraph(nodes)
+        tree_sub = self.tree.subgraph(self.labels(nodes))
+        self.assertEqual(sub.column('node'), tree_sub.nodes())
+        self.assertEqual(
+            [(sub.column('node')[u], sub.column('node')[v])
+             for u, v in sub.edges()],
+            tree_sub.edges())
+
+    def test_networkx_round_trip(self):
+        g = self.compact.to_networkx('node')
+        self.assertEqual(g.nodes(), self.tree.nodes())
+        self.assertEqual(g.edges(), self.tree.edges())
+        compact = CompactGraph.from_networkx(g, 'node')
+        self.assertEqual(compact.column('node'), self.nodes)
+        self.assertEqual(list(compact.edges()), list(self.compact.edges()))
+        self.assertEqual(compact.graph, self.compact.graph)
+
+
+if __name__ == '__main__':
+    unittest.main()
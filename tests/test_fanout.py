@@ -0,0 +1,113 @@
+"""Tests of the fan-out emitter."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from amtt.exporter.isograph.emitter.csv import CsvEmitter
+from amtt.exporter.isograph.emitter.fanout import FanOutEmitter
+from amtt.exporter.isograph.emitter.sqlite import SqliteEmitter
+from amtt.exporter.isograph.emitter.xml import XmlEmitter
+
+PAGES = 3
+BLOCKS_PER_PAGE = 4
+
+
+def emit_rows(emitter):
+    """Add a few pages of blocks, nodes and connections to the emitter."""
+    emitter.add_failure_model('FM', 'Exponential', mttf=1000)
+    for page in range(PAGES):
+        page_id = 'P{}'.format(page)
+        for i in range(BLOCKS_PER_PAGE):
+            emitter.add_block(Id='{}B{}'.format(page_id, i), Page=page_id,
+                              XPosition=i, YPosition=0)
+        emitter.add_node(Id='{}N'.format(page_id), Page=page_id, Vote=1,
+                         XPosition=BLOCKS_PER_PAGE, YPosition=0)
+        for i in range(BLOCKS_PER_PAGE):
+            emitter.add_connection(
+                '{}C{}'.format(page_id, i), page_id,
+                '{}B{}'.format(page_id, i), 'Block',
+                '{}N'.format(page_id), 'Node')
+
+
+class FanOutEmitterTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def count_rows(self, path, table):
+        connection = sqlite3.connect(path)
+        try:
+            return connection.execute(
+                'SELECT COUNT(*) FROM "{}"'.format(table)).fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_streaming_xml_and_sqlite(self):
+        emitters = [XmlEmitter(self._dir.name, streaming=True,
+                               output_name='model'),
+                    SqliteEmitter(self._dir.name, streaming=True,
+                                  output_name='model')]
+        emitter = FanOutEmitter(emitters)
+        emitter.open()
+        emit_rows(emitter)
+        emitter.commit()
+        self.assertTrue(os.path.exists(emitters[0].output_file_path))
+        path = emitters[1].output_file_path
+        self.assertEqual(self.count_rows(path, 'RbdBlocks'),
+                         PAGES * BLOCKS_PER_PAGE)
+        self.assertEqual(self.count_rows(path, 'RbdNodes'), PAGES)
+        self.assertEqual(self.count_rows(path, 'RbdConnections'),
+                         PAGES * BLOCKS_PER_PAGE)
+        self.assertEqual(self.count_rows(path, 'FailureModels'), 1)
+
+    def rows(self, path, table):
+        connection = sqlite3.connect(path)
+        try:
+            return connection.execute(
+                'SELECT * FROM "{}"'.format(table)).fetchall()
+        finally:
+            connection.close()
+
+    def test_repeat_blocks(self):
+        emitters = [SqliteEmitter(self._dir.name, streaming=streaming,
+                                  output_name='model{}'.format(streaming))
+                    for streaming in (False, True)]
+        emitter = FanOutEmitter(emitters)
+        emitter.open()
+        emitter.add_block(Id='B0', Page='P', XPosition=0, YPosition=0)
+        emitter.add_block(Id='B1', Page='P', XPosition=1, YPosition=0)
+        emitter.add_repeat_block(Id='R0', Page='P', ReferenceBlock='B0',
+                                 XPosition=0, YPosition=1)
+        emitter.add_node(Id='N', Page='P', Vote=1, XPosition=2,
+                         YPosition=0)
+        emitter.add_connection('C0', 'P', 'B1', 'Block', 'N', 'Node')
+        emitter.add_connection('C1', 'P', 'R0', 'Rbd repeat block',
+                               'N', 'Node')
+        emitter.commit()
+        for e in emitters:
+            path = e.output_file_path
+            self.assertEqual(self.rows(path, 'RbdRepeatBlocks'),
+                             [('R0', 'P', 'B0', 0, 1)])
+            # Repeat blocks are indexed apart from the blocks
+            self.assertEqual(
+                [r[3:] for r in self.rows(path, 'RbdConnections')],
+                [(1, 'Block', 0, 'Node'), (0, 'Rbd repeat block', 0, 'Node')])
+
+    def test_abort_removes_partial_output(self):
+        emitters = [XmlEmitter(self._dir.name, streaming=True,
+                               output_name='model'),
+                    SqliteEmitter(self._dir.name, streaming=True,
+                                  output_name='model'),
+                    CsvEmitter(self._dir.name, output_name='model')]
+        emitter = FanOutEmitter(emitters)
+        emitter.open()
+        emit_rows(emitter)
+        emitter.abort()
+        self.assertEqual(os.listdir(self._dir.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Tests of the built-in RBD layout engine."""
+
+import unittest
+
+import networkx as nx
+
+from amtt.exporter.isograph.layout import (layered_layout,
+                                           structural_fingerprint,
+                                           NODE_WIDTH, NODE_HEIGHT,
+                                           RANK_SEPARATION, NODE_SEPARATION)
+from amtt.exporter.isograph.rbd import _RbdBlock, _RbdNode
+
+STEP_X = NODE_WIDTH + RANK_SEPARATION
+STEP_Y = NODE_HEIGHT + NODE_SEPARATION
+
+
+def x(rank):
+    """Return the x coordinate of the given rank."""
+    return NODE_WIDTH // 2 + rank * STEP_X
+
+
+def y(row):
+    """Return the y coordinate of the given row (0 is the bottom one)."""
+    return NODE_HEIGHT // 2 + int(row * STEP_Y)
+
+
+def diagram(prefix, blocks, nodes, edges):
+    """Return an internal graph, with the element names prefixed.
+
+    Args:
+        blocks (list): The block names.
+        nodes (dict): The node names -> vote values.
+        edges (list): The edges, as (name, name) tuples.
+    """
+    g = nx.DiGraph()
+    for name in blocks:
+        b = _RbdBlock((prefix, name), 'CODE', 'Rbd block')
+        g.add_node(b.id, obj=b)
+    for name, vote in nodes.items():
+        n = _RbdNode((prefix, name), vote)
+        g.add_node(n.id, obj=n)
+    g.add_edges_from(((prefix, u), (prefix, v)) for u, v in edges)
+    return g
+
+
+def k_out_of_n(prefix, vote=2):
+    """Return a 2-out-of-3 diagram, whose first branch is a series."""
+    return diagram(prefix, ['A1', 'A2', 'B', 'C'],
+                   {'In': None, 'Out': vote},
+                   [('In', 'A1'), ('A1', 'A2'), ('A2', 'Out'),
+                    ('In', 'B'), ('B', 'Out'),
+                    ('In', 'C'), ('C', 'Out')])
+
+
+class LayeredLayoutTest(unittest.TestCase):
+
+    def test_series(self):
+        g = nx.DiGraph([('A', 'B'), ('B', 'C')])
+        self.assertEqual(layered_layout(g),
+                         {'A': (x(0), y(0)), 'B': (x(1), y(0)),
+                          'C': (x(2), y(0))})
+
+    def assert_ranks(self, positions, ranks):
+        """Assert the rank (x) and the rows (y) of the nodes of each rank.
+
+        ranks is a list of dicts, one per rank, mapping each node of the
+        rank to its row (0 is the bottom one).
+
+        The order of the nodes of the same rank that tie (e.g. parallel
+        blocks) follows the topological order, thus it is not asserted.
+        """
+        for rank, rows in enumerate(ranks):
+            self.assertEqual(
+                set(n for n, p in positions.items() if p[0] == x(rank)),
+                set(rows))
+            self.assertEqual(
+                sorted(positions[n][1] for n in rows),
+                sorted(y(row) for row in rows.values()))
+
+    def test_parallel(self):
+        g = nx.DiGraph([('In', 'A'), ('In', 'B'), ('In', 'C'),
+                        ('A', 'Out'), ('B', 'Out'), ('C', 'Out')])
+        self.assert_ranks(layered_layout(g),
+                          [{'In': 1}, {'A': 0, 'B': 1, 'C': 2}, {'Out': 1}])
+
+    def test_k_out_of_n(self):
+        g = k_out_of_n('K')
+        positions = {n[1]: p for n, p in layered_layout(g).items()}
+        # Ranks follow the longest path, the tallest rank is centered
+        self.assert_ranks(positions,
+                          [{'In': 1}, {'A1': 0, 'B': 1, 'C': 2},
+                           {'A2': 1}, {'Out': 1}])
+
+    def test_barycenter_ordering(self):
+        # Q is added before P, yet P follows X, which is placed above Y
+        g = nx.DiGraph()
+        g.add_edges_from([('In', 'X'), ('In', 'Y'), ('Y', 'Q'), ('X', 'P')])
+        positions = layered_layout(g)
+        self.assertGreater(positions['X'][1], positions['Y'][1])
+        self.assertGreater(positions['P'][1], positions['Q'][1])
+        self.assertEqual(positions['P'][0], positions['Q'][0])
+
+    def test_empty(self):
+        self.assertEqual(layered_layout(nx.DiGraph()), {})
+
+
+class StructuralFingerprintTest(unittest.TestCase):
+
+    def test_renamed_diagrams(self):
+        self.assertEqual(structural_fingerprint(k_out_of_n('Magnet1')),
+                         structural_fingerprint(k_out_of_n('Magnet2')))
+
+    def test_different_votes(self):
+        self.assertNotEqual(structural_fingerprint(k_out_of_n('K', 2)),
+                            structural_fingerprint(k_out_of_n('K', 1)))
+
+    def test_different_edges(self):
+        series = diagram('S', ['A', 'B'], {}, [('A', 'B')])
+        parallel = diagram('S', ['A', 'B'], {}, [])
+        self.assertNotEqual(structural_fingerprint(series),
+                            structural_fingerprint(parallel))
+
+
+if __name__ == '__main__':
+    unittest.main()
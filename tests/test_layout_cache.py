@@ -0,0 +1,78 @@
+"""Tests of the persistent layout cache."""
+
+import os
+import tempfile
+import unittest
+
+from amtt.exporter.isograph.layout_cache import LayoutCache
+
+ENGINE = 'builtin'
+
+# Coordinates of about 0.6 MB, once stored, so that three entries exceed
+# a cache size cap of 1 MB.
+LARGE_COORDINATES = [(i, i) for i in range(50000)]
+
+
+class LayoutCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def entries(self):
+        return [name for name in os.listdir(self._dir.name)
+                if name.endswith('.json')]
+
+    def age_entry(self, cache, fingerprint, seconds):
+        """Set the last use time of an entry to seconds ago."""
+        path = cache._path(ENGINE, fingerprint)
+        mtime = os.stat(path).st_mtime - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_round_trip(self):
+        cache = LayoutCache(self._dir.name)
+        coordinates = [(0, 0.5), (1.25, -2)]
+        self.assertIsNone(cache.get(ENGINE, 'fp'))
+        cache.put(ENGINE, 'fp', coordinates)
+        self.assertEqual(cache.get(ENGINE, 'fp'), coordinates)
+        self.assertIsNone(cache.get('graphviz', 'fp'))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        # Entries persist across cache objects (i.e. runs)
+        cache = LayoutCache(self._dir.name)
+        self.assertEqual(cache.get(ENGINE, 'fp'), coordinates)
+
+    def test_evicts_least_recently_used(self):
+        cache = LayoutCache(self._dir.name, max_size=1)
+        for age, fingerprint in enumerate(['c', 'b', 'a']):
+            cache.put(ENGINE, fingerprint, LARGE_COORDINATES)
+            self.age_entry(cache, fingerprint, 100 * (age + 1))
+        # a is the oldest entry, but reading it marks it as recently used
+        self.assertIsNotNone(cache.get(ENGINE, 'a'))
+        cache.evict()
+        self.assertEqual(len(self.entries()), 1)
+        self.assertIsNotNone(cache.get(ENGINE, 'a'))
+        self.assertIsNone(cache.get(ENGINE, 'b'))
+        self.assertIsNone(cache.get(ENGINE, 'c'))
+
+    def test_no_eviction_below_cap(self):
+        cache = LayoutCache(self._dir.name, max_size=1)
+        cache.put(ENGINE, 'a', [(0, 0)])
+        cache.put(ENGINE, 'b', [(1, 1)])
+        cache.evict()
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_clear(self):
+        cache = LayoutCache(self._dir.name)
+        cache.put(ENGINE, 'a', [(0, 0)])
+        cache.put(ENGINE, 'b', [(1, 1)])
+        cache.clear()
+        self.assertEqual(self.entries(), [])
+        self.assertIsNone(cache.get(ENGINE, 'a'))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LayoutCache(self._dir.name, max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests of the lazy template expansion of the IR."""
+
+import unittest
+
+from amtt.loader import InputSheet
+from amtt.translator.ir import IRContainer
+from amtt.translator.rows import RowsContainer
+
+
+def build_rows():
+    """Return the rows of a model with nested templates.
+
+    Magnet is used by two circuits and Coil by the two poles of Magnet.
+    Orphan is not defined, thus it is not reachable from ROOT, yet it
+    uses Coil too.
+    """
+    rc = RowsContainer()
+
+    def component(type, name, parent, code, logic=None):
+        rc.add_row(InputSheet.components, type=type, name=name,
+                   parent=parent, code=code, instances=1, logic=logic)
+
+    component('Compound', 'System', 'ROOT', 'SYS')
+    for i in (1, 2):
+        component('Compound', 'Circuit{}'.format(i), 'System', 'C')
+        component('Compound', 'Magnet', 'Circuit{}'.format(i), 'MAG')
+    component('Compound', 'Magnet', '*', 'MAG')
+    component('Compound', 'Pole1', 'Magnet', 'P1')
+    component('Compound', 'Pole2', 'Magnet', 'P2')
+    component('Basic', 'Yoke', 'Magnet', 'Y', 'FM1')
+    component('Compound', 'Coil', 'Pole1', 'COIL')
+    component('Compound', 'Coil', 'Pole2', 'COIL')
+    component('Compound', 'Coil', '*', 'COIL')
+    component('Basic', 'Winding', 'Coil', 'W', 'FM1')
+    component('Compound', 'Coil', 'Orphan', 'COIL')
+    component('Basic', 'Spare', 'Orphan', 'S', 'FM1')
+    for name in ('System', 'Circuit1', 'Circuit2', 'Magnet', 'Pole1',
+                 'Pole2', 'Coil'):
+        rc.add_row(InputSheet.logic, type='inherited', component=name,
+                   logic='AND')
+    rc.add_row(InputSheet.failure_models, name='FM1',
+               distribution='exponential', parameters='1000',
+               standbystate=None)
+    return rc
+
+
+def components(ir):
+    """Return the components of ir, in iteration order, as plain values."""
+    return [(node, obj.type, obj.name, obj.code, obj.description,
+             str(obj.logic), list(children))
+            for node, obj, children in ir.iter_components()]
+
+
+class LazyTemplatesTest(unittest.TestCase):
+
+    def load(self, **kwargs):
+        ir = IRContainer(**kwargs)
+        ir.load_from_rows(build_rows())
+        return ir
+
+    def assert_same_components(self, number=False):
+        containers = [self.load(),
+                      self.load(lazy_templates=True),
+                      self.load(compact_graphs=True)]
+        if number:
+            for ir in containers:
+                ir.number_components()
+        eager, lazy, compact = (components(ir) for ir in containers)
+        # ROOT, System, two circuits, each with a copy of Magnet (and of
+        # its three children), each with two copies of Coil (and Winding)
+        self.assertEqual(len(eager), 20)
+        self.assertEqual(lazy, eager)
+        self.assertEqual(compact, eager)
+
+    def test_same_components(self):
+        self.assertTrue(self.load().uses_templates)
+        self.assert_same_components()
+
+    def test_same_numbered_components(self):
+        self.assert_same_components(number=True)
+
+    def test_expanded_components_graph(self):
+        eager = self.load().component_graph
+        lazy = self.load(lazy_templates=True).component_graph
+        self.assertEqual(lazy.nodes(), eager.nodes())
+        self.assertEqual(lazy.edges(), eager.edges())
+        # The nodes not reachable from ROOT are kept as they are
+        self.assertIn(('Orphan',), eager)
+        self.assertIn(('Coil',), eager)
+
+
+if __name__ == '__main__':
+    unittest.main()
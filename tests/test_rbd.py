@@ -0,0 +1,75 @@
+"""Tests of the RBD builder of the Isograph exporter."""
+
+import unittest
+
+from amtt.loader import InputSheet
+from amtt.translator.ir import IRContainer
+from amtt.translator.rows import RowsContainer
+from amtt.exporter.isograph.rbd import Rbd
+
+
+class RecordingEmitter(object):
+    """Emitter keeping the added rows, as (sheet, row) tuples."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add_row(self, sheet, **kwargs):
+        self.rows.append((sheet, kwargs))
+
+
+def build_rows(failure_logic):
+    """Return the rows of a model with a group of redundant pumps.
+
+    The logic of the pumps is given by a failure node (failure_logic).
+    """
+    rc = RowsContainer()
+
+    def component(type, name, parent, code, instances=1, logic=None):
+        rc.add_row(InputSheet.components, type=type, name=name,
+                   parent=parent, code=code, instances=instances,
+                   logic=logic)
+
+    component('Compound', 'Machine', 'ROOT', 'M')
+    component('Group', 'Pumps', 'Machine', 'PG')
+    component('Basic', 'Pump', 'Pumps', 'P', 2, 'FM1')
+    component('FailureNode', 'PumpsFailure', 'Machine', 'PF')
+    component('FailureEvent', 'Pump', 'PumpsFailure', 'PE')
+    rc.add_row(InputSheet.logic, type='inherited', component='Machine',
+               logic='AND')
+    rc.add_row(InputSheet.logic, type='inherited', component='Pumps',
+               logic='AND')
+    rc.add_row(InputSheet.logic, type='failurenode',
+               component='PumpsFailure', logic=failure_logic)
+    rc.add_row(InputSheet.failure_models, name='FM1',
+               distribution='exponential', parameters='1000',
+               standbystate=None)
+    return rc
+
+
+class FailureLogicTest(unittest.TestCase):
+
+    def standby_modes(self, failure_logic):
+        """Return the standby modes of the pump blocks."""
+        ir = IRContainer()
+        ir.load_from_rows(build_rows(failure_logic))
+        rbd = Rbd()
+        rbd.from_ir_container(ir)
+        emitter = RecordingEmitter()
+        rbd.serialize(emitter)
+        return [row['StandbyMode'] for sheet, row in emitter.rows
+                if sheet == 'RbdBlocks' and row['Page'] == 'M']
+
+    def test_active_failure_logic(self):
+        self.assertEqual(self.standby_modes('ACTIVE(1,2)'), ['Hot', 'Hot'])
+
+    def test_standby_failure_logic(self):
+        self.assertEqual(self.standby_modes('STANDBY(1,2)'),
+                         ['Cold', 'Cold'])
+
+    def test_or_failure_logic(self):
+        self.assertEqual(self.standby_modes('OR'), [None, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+"""Tests of the translator input rows."""
+
+import unittest
+
+from amtt.loader import InputSheet, SCHEMAS
+from amtt.translator.rows import ComponentRow, LogicRow, FailureModelRow
+
+ROW_CLASSES = {
+    InputSheet.components: ComponentRow,
+    InputSheet.logic: LogicRow,
+    InputSheet.failure_models: FailureModelRow,
+}
+
+
+class RowsTest(unittest.TestCase):
+
+    def test_slots_match_schemas(self):
+        for sheet, row_class in ROW_CLASSES.items():
+            self.assertEqual(set(row_class.__slots__), SCHEMAS[sheet])
+
+    def test_rows_hold_all_columns(self):
+        for sheet, row_class in ROW_CLASSES.items():
+            row = row_class(**{column: column for column in SCHEMAS[sheet]})
+            for column in SCHEMAS[sheet]:
+                self.assertEqual(getattr(row, column), column)
+
+
+if __name__ == '__main__':
+    unittest.main()